@@ -0,0 +1,75 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from foodblogdataset import FoodBlogDataset
+
+
+class AsyncFoodBlogDataset:
+    def __init__(self, database, max_workers=None, read_limit=None, write_limit=1):
+        if database.pool is None:
+            raise ValueError("AsyncFoodBlogDataset needs a FoodBlogDataset opened with pool_size")
+
+        pool_size = database.pool.size
+        self.database = database
+        self.executor = ThreadPoolExecutor(max_workers or pool_size + write_limit, thread_name_prefix="foodblog")
+        self.limits = {
+            "read": asyncio.Semaphore(read_limit or pool_size),
+            "write": asyncio.Semaphore(write_limit),
+        }
+
+    @classmethod
+    async def open(cls, database_name, pool_size=4, use_index=False, read_only=False, **kwargs):
+        loop = asyncio.get_running_loop()
+        database = await loop.run_in_executor(None, functools.partial(
+            FoodBlogDataset, database_name, use_index=use_index, read_only=read_only, pool_size=pool_size))
+        return cls(database, **kwargs)
+
+    async def run(self, kind, function, *args, **kwargs):
+        limit = self.limits[kind]
+        await limit.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+        except BaseException:
+            limit.release()
+            raise
+        # Work that has started runs to the end (a write to its commit or rollback) even
+        # when the caller is cancelled, so its slot is only given back once it finishes.
+        future.add_done_callback(lambda _: limit.release())
+        return await asyncio.shield(future)
+
+    async def find_recipe(self, ingredients, meals=None):
+        return await self.run("read", self.database.search_recipes, ingredients, meals)
+
+    async def available_meals(self):
+        return await self.run("read", self.database.list_meals)
+
+    async def available_measures(self):
+        return await self.run("read", self.database.available_measures)
+
+    async def available_ingredients(self):
+        return await self.run("read", self.database.available_ingredients)
+
+    async def add_recipe(self, name, description, meal_ids=(), quantities=()):
+        return await self.run("write", self.database.add_recipe, name, description, meal_ids, quantities)
+
+    async def insert_recipe(self, name, description):
+        return await self.run("write", self.database.add_recipe, name, description)
+
+    async def insert_quantity(self, user_measure_id, user_ingredient_id, quantity, recipe_id):
+        await self.run("write", self.database.add_to_recipe, recipe_id,
+                       quantities=[(user_measure_id, user_ingredient_id, quantity)])
+
+    async def meals_to_serve(self, meal_ids, recipe_id):
+        await self.run("write", self.database.add_to_recipe, recipe_id, meal_ids=meal_ids)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
+        self.database.close_connection()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,66 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+worker_index = None
+
+
+def split_names(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [name for name in value.split(",") if name]
+    return list(value)
+
+
+def read_queries(file_name):
+    with open(file_name, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                query = json.loads(line)
+                yield query.get("id", line_number), split_names(query.get("ingredients")), \
+                    split_names(query.get("meals")) or None
+            else:
+                yield line_number, split_names(line), None
+
+
+def chunks(queries, chunk_size):
+    queries = iter(queries)
+    while True:
+        chunk = list(islice(queries, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def init_worker(index):
+    global worker_index
+    worker_index = index
+
+
+def match_chunk(queries):
+    return match_queries(worker_index, queries)
+
+
+def match_queries(index, queries):
+    return [(query_id, index.match(ingredients, meals)) for query_id, ingredients, meals in queries]
+
+
+def match_batch(index, queries, workers=None, chunk_size=500):
+    query_chunks = chunks(queries, chunk_size)
+    first_chunks = list(islice(query_chunks, 2))
+    workers = workers or os.cpu_count() or 1
+
+    # A batch that fits in one chunk is cheaper to answer than to ship to a worker.
+    if workers == 1 or len(first_chunks) < 2:
+        for chunk in chain(first_chunks, query_chunks):
+            yield from match_queries(index, chunk)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(index,)) as executor:
+        for results in executor.map(match_chunk, chain(first_chunks, query_chunks)):
+            yield from results
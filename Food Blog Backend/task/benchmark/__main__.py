@@ -0,0 +1,31 @@
+import argparse
+import json
+from benchmark.harness import compare, load, run, save
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--ingredients', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--inserts', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default='benchmark_data')
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run(args.workdir, args.sizes, args.ingredients, args.repeat, args.inserts, args.seed)
+
+    if args.output:
+        save(results, args.output)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.threshold)
+        for metric, old_value, value, change in regressions:
+            print(f"REGRESSION {metric}: {old_value:.4g} -> {value:.4g} ({change:+.0%})")
+        if regressions:
+            raise SystemExit(1)
+        print("No regressions against the baseline.")
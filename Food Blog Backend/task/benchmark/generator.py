@@ -0,0 +1,49 @@
+import random
+from itertools import accumulate
+from foodblogdataset import FoodBlogDataset
+
+
+def ingredient_name(number):
+    return f"ingredient{number:05d}"
+
+
+def add_ingredients(database, count):
+    existing = len(database.available_ingredients())
+    rows = [(ingredient_name(number),) for number in range(existing + 1, count + 1)]
+    with database.transaction() as cursor:
+        cursor.executemany("INSERT OR IGNORE INTO ingredients (ingredient_name) VALUES (?)", rows)
+    database.invalidate_resolver()
+
+
+def generate_recipes(ingredient_ids, meal_ids, measure_ids, count, seed=0, max_ingredients=8, max_meals=3):
+    rng = random.Random(seed)
+    # Popular ingredients (milk, sugar...) show up in far more recipes than rare ones.
+    cumulative_weights = list(accumulate(1 / rank for rank in range(1, len(ingredient_ids) + 1)))
+
+    for number in range(1, count + 1):
+        size = rng.randint(1, max_ingredients)
+        recipe_ingredients = dict.fromkeys(rng.choices(ingredient_ids, cum_weights=cumulative_weights, k=size))
+        meals = rng.sample(meal_ids, rng.randint(1, min(max_meals, len(meal_ids))))
+        quantities = [(rng.choice(measure_ids), ingredient_id, rng.randint(1, 500))
+                      for ingredient_id in recipe_ingredients]
+        yield f"Recipe {number}", f"Generated recipe number {number}.", meals, quantities
+
+
+def generate(database_name, recipes=1000, ingredients=100, seed=0, batch_size=1000):
+    database = FoodBlogDataset(database_name)
+    add_ingredients(database, ingredients)
+
+    ingredient_ids = [ingredient_id for ingredient_id, _ in database.available_ingredients()]
+    meal_ids = [meal_id for meal_id, _ in database.list_meals()]
+    measure_ids = [measure_id for measure_id, _ in database.available_measures()]
+
+    batch = []
+    for recipe in generate_recipes(ingredient_ids, meal_ids, measure_ids, recipes, seed):
+        batch.append(recipe)
+        if len(batch) >= batch_size:
+            database.write_batch(batch)
+            batch = []
+    if batch:
+        database.write_batch(batch)
+
+    database.close_connection()
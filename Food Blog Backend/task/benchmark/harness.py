@@ -0,0 +1,161 @@
+import json
+import os
+import random
+import statistics
+import time
+from foodblogdataset import FoodBlogDataset
+from benchmark.generator import generate, ingredient_name
+
+LOWER_IS_BETTER = "lower"
+HIGHER_IS_BETTER = "higher"
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def latency(timings):
+    timings = sorted(timings)
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[max(int(len(timings) * 0.95) - 1, 0)] * 1000,
+    }
+
+
+def remove_database(database_name):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(database_name + suffix):
+            os.remove(database_name + suffix)
+
+
+def bench_startup(database_name, repeat):
+    return latency(timed(lambda: FoodBlogDataset(database_name).close_connection(), repeat))
+
+
+def bench_inserts(database_name, count):
+    database = FoodBlogDataset(database_name)
+
+    started = time.perf_counter()
+    for number in range(count):
+        database.insert_recipe(f"Insert {number}", "Inserted one row at a time.")
+        database.meals_to_serve([1, 3])
+        database.insert_quantity(1, 1, 250)
+        database.insert_quantity(5, 6, 1)
+    wrapper_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for number in range(count):
+        database.add_recipe(f"Add {number}", "Inserted in one transaction.", [1, 3], [(1, 1, 250), (5, 6, 1)])
+    add_recipe_seconds = time.perf_counter() - started
+
+    database.close_connection()
+    return {
+        "insert_wrappers_per_second": count / wrapper_seconds,
+        "add_recipe_per_second": count / add_recipe_seconds,
+    }
+
+
+def bench_find_recipe(database_name, ingredients, repeat, seed=0):
+    rng = random.Random(seed)
+    names = ["milk", "sugar", "cacao", "strawberry"] + [ingredient_name(number) for number in range(7, ingredients)]
+    queries = [rng.sample(names[:20], rng.randint(1, 3)) for _ in range(repeat)]
+
+    database = FoodBlogDataset(database_name, read_only=True)
+    query_iterator = iter(queries)
+    results = latency(timed(lambda: database.search_recipes(next(query_iterator)), repeat))
+    database.close_connection()
+    return results
+
+
+def bench_resolution(database_name, repeat, seed=0):
+    rng = random.Random(seed)
+    database = FoodBlogDataset(database_name, read_only=True)
+
+    started = time.perf_counter()
+    resolver = database.resolver()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    ingredients = [name for _, name in database.available_ingredients()]
+    inputs = [(rng.choice(["ml", "g", "cu", "tb", "ts", "t"]), rng.choice(ingredients)[rng.randint(0, 3):])
+              for _ in range(repeat)]
+
+    def resolve_all():
+        for measure, ingredient in inputs:
+            resolver.resolve_measure(measure)
+            resolver.resolve_ingredient(ingredient)
+
+    total = timed(resolve_all, 1)[0]
+    database.close_connection()
+    return {"resolver_build_ms": build_ms, "resolve_us": total / repeat * 1_000_000}
+
+
+def run(workdir, sizes, ingredients=200, repeat=200, insert_count=200, seed=0):
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+
+    for size in sizes:
+        database_name = os.path.join(workdir, f"bench_{size}.db")
+        remove_database(database_name)
+        started = time.perf_counter()
+        generate(database_name, size, ingredients, seed)
+        results[f"generate_{size}_seconds"] = time.perf_counter() - started
+
+        for name, value in bench_find_recipe(database_name, ingredients, repeat, seed).items():
+            results[f"find_recipe_{size}_{name}"] = value
+
+    database_name = os.path.join(workdir, f"bench_{sizes[-1]}.db")
+    for name, value in bench_startup(database_name, repeat).items():
+        results[f"startup_{name}"] = value
+    for name, value in bench_resolution(database_name, repeat * 10, seed).items():
+        results[name] = value
+
+    database_name = os.path.join(workdir, "bench_inserts.db")
+    remove_database(database_name)
+    results.update(bench_inserts(database_name, insert_count))
+    remove_database(database_name)
+
+    return {
+        "meta": {
+            "sizes": sizes,
+            "ingredients": ingredients,
+            "repeat": repeat,
+            "seed": seed,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def direction(metric):
+    if metric.endswith("_per_second"):
+        return HIGHER_IS_BETTER
+    return LOWER_IS_BETTER
+
+
+def compare(current, baseline, threshold=0.2):
+    regressions = []
+    for metric, value in current["results"].items():
+        old_value = baseline["results"].get(metric)
+        if not old_value:
+            continue
+        change = (value - old_value) / old_value
+        if direction(metric) == HIGHER_IS_BETTER:
+            change = -change
+        if change > threshold:
+            regressions.append((metric, old_value, value, change))
+    return regressions
+
+
+def load(file_name):
+    with open(file_name, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save(results, file_name):
+    with open(file_name, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
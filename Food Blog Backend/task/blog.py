@@ -1,5 +1,21 @@
 import argparse
-from foodblogdataset import FoodBlogDataset
+import atexit
+import json
+import sys
+from batchsearch import read_queries
+from foodblogdataset import BulkImportError, FoodBlogDataset
+from federation import FederatedFoodBlog
+from foodblogserver import FoodBlogServer
+from recipefile import write_recipes
+from snapshot import Snapshot, is_snapshot, write_snapshot
+from resolver import AMBIGUOUS
+
+
+def recipe_id_list(value):
+    try:
+        return [int(recipe_id) for recipe_id in value.split(",") if recipe_id]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma separated recipe ids, got {value!r}") from None
 
 
 if __name__ == "__main__":
@@ -7,19 +23,168 @@ if __name__ == "__main__":
     parser.add_argument('database_name', default='food_blog.db')
     parser.add_argument('--ingredients')
     parser.add_argument('--meals')
+    parser.add_argument('--text')
+    parser.add_argument('--closest', action='store_true')
+    parser.add_argument('--shopping-list', type=recipe_id_list)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--format', choices=['text', 'jsonl'], default='text')
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--shard', action='append', default=[])
+    subparsers = parser.add_subparsers(dest='command')
+    import_parser = subparsers.add_parser('import')
+    import_parser.add_argument('file')
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'])
+    import_parser.add_argument('--batch-size', type=int, default=1000)
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--pool-size', type=int, default=4)
+    serve_parser.add_argument('--cache-size', type=int, default=1024)
+    search_parser = subparsers.add_parser('search')
+    search_parser.add_argument('--queries', required=True)
+    search_parser.add_argument('--workers', type=int)
+    search_parser.add_argument('--chunk-size', type=int, default=500)
+    snapshot_parser = subparsers.add_parser('snapshot')
+    snapshot_parser.add_argument('file')
+    export_parser = subparsers.add_parser('export')
+    export_parser.add_argument('file')
+    export_parser.add_argument('--format', choices=['csv', 'jsonl'])
+    export_parser.add_argument('--gzip', action='store_true', default=None)
+    export_parser.add_argument('--after', type=int, default=0)
+    export_parser.add_argument('--batch-size', type=int, default=500)
     args = parser.parse_args()
-    database = FoodBlogDataset(args.database_name)
+    if args.closest and args.ingredients is None:
+        parser.error("--closest needs --ingredients")
+
+    if is_snapshot(args.database_name):
+        if args.ingredients is None:
+            parser.error("a snapshot file can only answer --ingredients searches")
+        snapshot = Snapshot(args.database_name)
+        found_recipes = snapshot.search_recipes(args.ingredients.split(","), args.meals.split(",") if args.meals else None)
+        if found_recipes:
+            print(f"Recipes selected for you: {', '.join(found_recipes)}")
+        else:
+            print("There are no such recipes in the database.")
+        snapshot.close()
+        raise SystemExit
+
+    if args.shard:
+        if args.ingredients is None and args.text is None:
+            parser.error("--shard can only answer --ingredients and --text searches")
+        federation = FederatedFoodBlog([args.database_name] + args.shard)
+        user_ingredients = args.ingredients.split(",") if args.ingredients else None
+        user_meals = args.meals.split(",") if args.meals else None
+        if args.text is not None:
+            found_rows = federation.search_text(args.text, args.limit, user_ingredients, user_meals)
+        else:
+            found_rows = federation.search_recipe_rows(user_ingredients, user_meals)
+        if args.format == 'jsonl':
+            for recipe in found_rows:
+                print(json.dumps(recipe))
+        elif found_rows:
+            print(f"Recipes selected for you: {', '.join(recipe['name'] for recipe in found_rows)}")
+        else:
+            print("There are no such recipes in the database.")
+        federation.close()
+        raise SystemExit
+
+    if args.command == 'serve':
+        database = FoodBlogDataset(args.database_name, pool_size=args.pool_size, profile=args.profile)
+        if args.profile:
+            atexit.register(lambda: print(database.profiler.summary(), file=sys.stderr))
+        server = FoodBlogServer((args.host, args.port), database, args.cache_size)
+        print(f"Serving {args.database_name} on http://{args.host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.server_close()
+        database.close_connection()
+        raise SystemExit
+
+    database = FoodBlogDataset(args.database_name, profile=args.profile)
+    if args.profile:
+        atexit.register(lambda: print(database.profiler.summary(), file=sys.stderr))
 
     start_menu = True
 
-    if not args.ingredients is None:
+    if args.command == 'import':
+        try:
+            imported = database.bulk_import(args.file, args.batch_size, args.format)
+        except BulkImportError as e:
+            database.close_connection()
+            print(f"Import stopped. {e}", file=sys.stderr)
+            print(f"Imported {e.imported} recipes.")
+            raise SystemExit(1)
+        print(f"Imported {imported} recipes.")
+        start_menu = False
+
+    if args.command == 'snapshot':
+        write_snapshot(database, args.file)
+        print(f"Snapshot written to {args.file}.")
+        start_menu = False
+
+    if args.command == 'export':
+        exported, last_id = write_recipes(args.file, database.export(args.after, args.batch_size), args.format,
+                                          args.gzip)
+        print(f"Exported {exported} recipes to {args.file}, last id {last_id if exported else args.after}.")
+        start_menu = False
+
+    if args.command == 'search':
+        for query_id, recipes in database.find_recipes_batch(read_queries(args.queries), args.workers,
+                                                              args.chunk_size):
+            print(json.dumps({"id": query_id, "recipes": recipes}))
+        start_menu = False
+
+    if args.text is not None:
+        user_ingredients = args.ingredients.split(",") if args.ingredients else None
+        user_meals = args.meals.split(",") if args.meals else None
+        found_rows = database.search_text(args.text, args.limit, user_ingredients, user_meals)
+        found_recipes = [recipe_name for _, recipe_name in found_rows]
+        if args.format == 'jsonl':
+            for recipe_id, recipe_name in found_rows:
+                print(json.dumps({"id": recipe_id, "name": recipe_name}))
+        elif found_recipes:
+            print(f"Recipes selected for you: {', '.join(found_recipes)}")
+        else:
+            print("There are no such recipes in the database.")
+        start_menu = False
+
+    elif args.shopping_list is not None:
+        for ingredient, unit, total in database.aggregate_ingredients(args.shopping_list):
+            if args.format == 'jsonl':
+                print(json.dumps({"ingredient": ingredient, "unit": unit, "total": total}), flush=True)
+            else:
+                print(f"{ingredient}: {total} {unit}".rstrip())
+        start_menu = False
+
+    elif args.closest:
+        ranked = database.rank_recipes(args.ingredients.split(","), args.limit)
+        if args.format == 'jsonl':
+            for recipe in ranked:
+                print(json.dumps(recipe))
+        elif ranked:
+            print("Closest recipes for you:")
+            for recipe in ranked:
+                print(f"{recipe['name']} (missing {recipe['missing']}, unused {recipe['extra']})")
+        else:
+            print("There are no such recipes in the database.")
+        start_menu = False
+
+    elif not args.ingredients is None:
         user_ingredients = args.ingredients.split(",")
-        database.find_recipe(user_ingredients)
+        user_meals = args.meals.split(",") if args.meals else None
+        if args.format == 'jsonl':
+            for recipe_id, recipe_name in database.iter_recipes(user_ingredients, user_meals):
+                print(json.dumps({"id": recipe_id, "name": recipe_name}), flush=True)
+        else:
+            database.find_recipe(user_ingredients, user_meals)
         database.close_connection()
         start_menu = False
 
     # MENU
-    print("Pass the empty recipe to exit.")
+    if start_menu:
+        print("Pass the empty recipe to exit.")
 
     while start_menu:
         recipe_name = input("Recipe name: ")
@@ -28,10 +193,10 @@ if __name__ == "__main__":
             break
 
         recipe_description = input("Recipe description: ")
-        database.insert_recipe(recipe_name, recipe_description)
         database.available_meals()
         service_time = list(map(int, input("When the dish can be served:").split(" ")))
-        database.meals_to_serve(service_time)
+        quantities = []
+        resolver = database.resolver()
 
         # SUBMENU
         while True:
@@ -45,52 +210,29 @@ if __name__ == "__main__":
                 user_measure = user_ingredient_input[1]
                 user_ingredient = user_ingredient_input[2]
 
-                selected_measure_id = None
-
-                for m in database.available_measures():
-                    measure_id, measure_name = m
-                    if measure_name.startswith(user_measure):
-                        if selected_measure_id is not None:
-                            selected_measure_id = None
-                            break
-                        selected_measure_id = measure_id
+                selected_measure_id = resolver.resolve_measure(user_measure)
 
-                if selected_measure_id is None:
+                if selected_measure_id is None or selected_measure_id is AMBIGUOUS:
                     print("The measure is not conclusive!")
                     continue
 
             elif len(user_ingredient_input) == 2:
                 user_quantity = user_ingredient_input[0]
-                selected_measure_id = None
-
-                for m in database.available_measures():
-                    measure_id, measure_name = m
-                    if measure_name == '':
-                        if selected_measure_id is not None:
-                            selected_measure_id = None
-                            break
-                        selected_measure_id = measure_id
-
+                selected_measure_id = resolver.measure_ids.get('')
                 user_ingredient = user_ingredient_input[1]
 
             else:
                 print("Wrong input")
                 continue
 
-            selected_ingredient_id = None
-
-            for i in database.available_ingredients():
-                ingredient_id, ingredient_name = i
-                if user_ingredient in ingredient_name:
-                    if selected_ingredient_id is not None:
-                        selected_ingredient_id = None
-                        break
-                    selected_ingredient_id = ingredient_id
+            selected_ingredient_id = resolver.resolve_ingredient(user_ingredient)
 
-            if selected_ingredient_id is None:
+            if selected_ingredient_id is None or selected_ingredient_id is AMBIGUOUS:
                 print("The ingredient is not conclusive!")
                 continue
 
-            database.insert_quantity(int(selected_measure_id), int(selected_ingredient_id), int(user_quantity))
+            quantities.append((int(selected_measure_id), int(selected_ingredient_id), int(user_quantity)))
+
+        database.add_recipe(recipe_name, recipe_description, service_time, quantities)
 
     database.close_connection()
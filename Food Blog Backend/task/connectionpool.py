@@ -0,0 +1,149 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+
+def connect(database_name, read_only=False, timeout=5.0, check_same_thread=True):
+    if read_only:
+        conn = sqlite3.connect(f"file:{pathname2url(database_name)}?mode=ro", uri=True, timeout=timeout,
+                               check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(database_name, timeout=timeout, check_same_thread=check_same_thread)
+    conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, database_name, size=4, timeout=5.0, read_only=False):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.database_name = database_name
+        self.size = size
+        self.timeout = timeout
+        self.read_only = read_only
+
+        self.readers = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.writer_lock = threading.Lock()
+        self.closed = False
+        self.on_connect = None
+        self.counters = {
+            "created": 0,
+            "acquired": 0,
+            "waited": 0,
+            "timeouts": 0,
+            "in_use": 0,
+            "writes": 0,
+            "write_wait_seconds": 0.0,
+        }
+
+        self.writer = None
+        if not read_only:
+            self.writer = connect(database_name, timeout=timeout, check_same_thread=False)
+            self.writer.execute("PRAGMA journal_mode = WAL")
+
+    def new_reader(self):
+        conn = connect(self.database_name, read_only=self.read_only, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        if self.on_connect is not None:
+            self.on_connect(conn)
+        return conn
+
+    def acquire(self):
+        if self.closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed connection pool.")
+
+        try:
+            conn = self.readers.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                create = self.counters["created"] < self.size
+                if create:
+                    self.counters["created"] += 1
+            if create:
+                try:
+                    conn = self.new_reader()
+                except sqlite3.Error:
+                    with self.lock:
+                        self.counters["created"] -= 1
+                    raise
+            else:
+                with self.lock:
+                    self.counters["waited"] += 1
+                try:
+                    conn = self.readers.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self.lock:
+                        self.counters["timeouts"] += 1
+                    raise TimeoutError(f"No connection available within {self.timeout} seconds") from None
+
+        with self.lock:
+            self.counters["acquired"] += 1
+            self.counters["in_use"] += 1
+        return conn
+
+    def release(self, conn):
+        with self.lock:
+            self.counters["in_use"] -= 1
+        if self.closed:
+            conn.close()
+        else:
+            self.readers.put(conn)
+
+    @contextmanager
+    def reader(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.release(conn)
+
+    @contextmanager
+    def writing(self):
+        if self.writer is None:
+            raise sqlite3.OperationalError("attempt to write a readonly database")
+
+        started = time.perf_counter()
+        with self.writer_lock:
+            with self.lock:
+                self.counters["writes"] += 1
+                self.counters["write_wait_seconds"] += time.perf_counter() - started
+            yield self.writer
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats["size"] = self.size
+        stats["idle"] = self.readers.qsize()
+        return stats
+
+    def health(self):
+        health = {"ok": True, "closed": self.closed}
+        try:
+            with self.reader() as conn:
+                conn.execute("SELECT 1").fetchone()
+                health["journal_mode"] = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        except (sqlite3.Error, TimeoutError) as e:
+            health["ok"] = False
+            health["error"] = str(e)
+        health.update(self.stats())
+        return health
+
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                self.readers.get_nowait().close()
+            except queue.Empty:
+                break
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,110 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from foodblogdataset import FoodBlogDataset
+
+DICTIONARIES = {
+    "meals": "list_meals",
+    "ingredients": "available_ingredients",
+}
+
+
+class FederatedFoodBlog:
+    def __init__(self, database_names, max_workers=None, pool_size=2):
+        self.database_names = list(database_names)
+        self.executor = ThreadPoolExecutor(max_workers or len(self.database_names),
+                                           thread_name_prefix="foodblog-shard")
+        self.shards = list(self.executor.map(
+            lambda database_name: FoodBlogDataset(database_name, read_only=True, pool_size=pool_size),
+            self.database_names))
+
+        self.global_ids = {}
+        self.shard_ids = {}
+        self.reconcile_dictionaries()
+
+    def fan_out(self, function):
+        return list(self.executor.map(function, self.shards))
+
+    def reconcile_dictionaries(self):
+        # The same name may have a different id in every shard, so names are the
+        # global key and every shard gets a translation table to the global ids.
+        for kind, method in DICTIONARIES.items():
+            shard_rows = self.fan_out(lambda shard: getattr(shard, method)())
+            names = sorted({name or "" for rows in shard_rows for _, name in rows})
+            self.global_ids[kind] = {name: global_id for global_id, name in enumerate(names, 1)}
+            self.shard_ids[kind] = [{shard_id: self.global_ids[kind][name or ""] for shard_id, name in rows}
+                                    for rows in shard_rows]
+
+    def dictionary(self, kind):
+        return [(global_id, name) for name, global_id in self.global_ids[kind].items()]
+
+    def to_global(self, kind, shard_number, shard_id):
+        return self.shard_ids[kind][shard_number].get(shard_id)
+
+    def global_ids_of(self, kind, shard_number, shard_ids):
+        return sorted(self.to_global(kind, shard_number, int(shard_id)) for shard_id in (shard_ids or "").split(",")
+                      if shard_id)
+
+    def describe(self, shard_number, rows):
+        with self.shards[shard_number].reading() as cursor:
+            cursor.execute("SELECT recipes.recipe_id, recipes.recipe_description, "
+                           "(SELECT GROUP_CONCAT(DISTINCT ingredient_id) FROM quantity "
+                           "WHERE quantity.recipe_id = recipes.recipe_id), "
+                           "(SELECT GROUP_CONCAT(DISTINCT meal_id) FROM serve "
+                           "WHERE serve.recipe_id = recipes.recipe_id) "
+                           "FROM json_each(?) AS ids "
+                           "JOIN recipes "
+                           "ON recipes.recipe_id = ids.value", (json.dumps([recipe_id for recipe_id, _ in rows]),))
+            details = {recipe_id: details for recipe_id, *details in cursor.fetchall()}
+
+        described = []
+        for recipe_id, recipe_name in rows:
+            description, ingredient_ids, meal_ids = details.get(recipe_id, (None, None, None))
+            described.append({
+                "id": recipe_id,
+                "name": recipe_name,
+                "description": description,
+                "ingredient_ids": self.global_ids_of("ingredients", shard_number, ingredient_ids),
+                "meal_ids": self.global_ids_of("meals", shard_number, meal_ids),
+            })
+        return described
+
+    def merge(self, shard_results):
+        # A recipe copied into several shards (same name, description and ingredients,
+        # compared by global id) is reported once, from the first shard that has it;
+        # repeated recipes within one shard stay, as in a single database.
+        owners = {}
+        merged = []
+        for shard_number, recipe in shard_results:
+            key = (recipe["name"], recipe["description"], tuple(recipe["ingredient_ids"]))
+            if owners.setdefault(key, shard_number) != shard_number:
+                continue
+            merged.append({"shard": self.database_names[shard_number],
+                           **{field: value for field, value in recipe.items() if field != "description"}})
+        return merged
+
+    def fan_out_rows(self, function):
+        def search(shard_number):
+            return self.describe(shard_number, function(self.shards[shard_number]))
+        return list(self.executor.map(search, range(len(self.shards))))
+
+    def search_recipe_rows(self, ingredients, meals=None):
+        shard_rows = self.fan_out_rows(lambda shard: shard.search_recipe_rows(ingredients, meals))
+        return self.merge((shard_number, row) for shard_number, rows in enumerate(shard_rows) for row in rows)
+
+    def search_recipes(self, ingredients, meals=None):
+        return [recipe["name"] for recipe in self.search_recipe_rows(ingredients, meals)]
+
+    def search_text(self, text, limit=20, ingredients=None, meals=None):
+        shard_rows = self.fan_out_rows(lambda shard: shard.search_text(text, limit, ingredients, meals))
+        # BM25 scores depend on each shard's own corpus statistics and are not
+        # comparable, so shards contribute their results in rank order, in turns.
+        interleaved = ((shard_number, row)
+                       for ranked_rows in zip_longest(*shard_rows)
+                       for shard_number, row in enumerate(ranked_rows) if row is not None)
+        return self.merge(interleaved)[:limit]
+
+    def close(self):
+        for shard in self.shards:
+            shard.close_connection()
+        self.executor.shutdown()
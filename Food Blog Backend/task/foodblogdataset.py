@@ -1,74 +1,318 @@
+import base64
+import json
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from batchsearch import match_batch
+from connectionpool import ConnectionPool, connect
+from pantrysearch import IncidenceMatrix
+from profiler import Profiler, profiled
+from recipefile import read_recipes
+from recipeindex import RecipeIndex
+from resolver import AMBIGUOUS, DictionaryResolver
+from resultcache import ResultCache
+
+
+SCHEMA_VERSION = 4
+
+TABLES = {
+    "meals": '''
+        CREATE TABLE IF NOT EXISTS {name}(
+            meal_id INTEGER PRIMARY KEY,
+            meal_name VARCHAR(255) UNIQUE NOT NULL
+        )''',
+    "ingredients": '''
+        CREATE TABLE IF NOT EXISTS {name}(
+            ingredient_id INTEGER PRIMARY KEY,
+            ingredient_name VARCHAR(255) UNIQUE NOT NULL
+        )''',
+    "measures": '''
+        CREATE TABLE IF NOT EXISTS {name}(
+            measure_id INTEGER PRIMARY KEY,
+            measure_name VARCHAR(255) UNIQUE
+        )''',
+    "recipes": '''
+        CREATE TABLE IF NOT EXISTS {name}(
+           recipe_id INTEGER PRIMARY KEY,
+           recipe_name VARCHAR(255) NOT NULL,
+           recipe_description VARCHAR(255)
+        )''',
+    "serve": '''
+        CREATE TABLE IF NOT EXISTS {name}(
+            serve_id INTEGER PRIMARY KEY,
+            recipe_id INT NOT NULL,
+            meal_id INT NOT NULL,
+            FOREIGN KEY(recipe_id) REFERENCES recipes(recipe_id)
+            FOREIGN KEY(meal_id) REFERENCES meals(meal_id)
+        )''',
+    "quantity": '''
+        CREATE TABLE IF NOT EXISTS {name}(
+            quantity_id INTEGER PRIMARY KEY,
+            measure_id INT NOT NULL,
+            ingredient_id INT NOT NULL,
+            quantity INT NOT NULL,
+            recipe_id INT NOT NULL,
+            FOREIGN KEY(measure_id) REFERENCES measures(measure_id)
+            FOREIGN KEY(ingredient_id) REFERENCES ingredients(ingredient_id)
+            FOREIGN KEY(recipe_id) REFERENCES recipes(recipe_id)
+        )''',
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS quantity_ingredient_recipe ON quantity(ingredient_id, recipe_id)",
+    "CREATE INDEX IF NOT EXISTS quantity_recipe ON quantity(recipe_id)",
+    "CREATE INDEX IF NOT EXISTS quantity_measure ON quantity(measure_id)",
+    "CREATE INDEX IF NOT EXISTS serve_meal_recipe ON serve(meal_id, recipe_id)",
+    "CREATE INDEX IF NOT EXISTS serve_recipe ON serve(recipe_id)",
+]
+
+FULL_TEXT_INDEX = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5("
+    "recipe_name, recipe_description, content='recipes', content_rowid='recipe_id')",
+    "CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN "
+    "INSERT INTO recipes_fts(rowid, recipe_name, recipe_description) "
+    "VALUES (new.recipe_id, new.recipe_name, new.recipe_description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS recipes_fts_delete AFTER DELETE ON recipes BEGIN "
+    "INSERT INTO recipes_fts(recipes_fts, rowid, recipe_name, recipe_description) "
+    "VALUES ('delete', old.recipe_id, old.recipe_name, old.recipe_description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS recipes_fts_update AFTER UPDATE ON recipes BEGIN "
+    "INSERT INTO recipes_fts(recipes_fts, rowid, recipe_name, recipe_description) "
+    "VALUES ('delete', old.recipe_id, old.recipe_name, old.recipe_description); "
+    "INSERT INTO recipes_fts(rowid, recipe_name, recipe_description) "
+    "VALUES (new.recipe_id, new.recipe_name, new.recipe_description); "
+    "END",
+    "INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')",
+]
+
+MEASURE_UNITS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS measure_units(
+        measure_id INTEGER PRIMARY KEY,
+        base_unit VARCHAR(255) NOT NULL,
+        factor INT NOT NULL,
+        FOREIGN KEY(measure_id) REFERENCES measures(measure_id)
+    )'''
+
+# measure name -> (base unit, how many base units one measure holds)
+MEASURE_UNITS = {
+    "ml": ("ml", 1),
+    "l": ("ml", 1000),
+    "cup": ("ml", 240),
+    "tbsp": ("ml", 15),
+    "dsp": ("ml", 10),
+    "tsp": ("ml", 5),
+    "g": ("g", 1),
+    "": ("", 1),
+}
+
+
+def full_text_query(text):
+    # Quote every word so user input is never parsed as FTS5 syntax; the last
+    # word also matches as a prefix so partially typed names still find dishes.
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+class BulkImportError(ValueError):
+    def __init__(self, message, imported):
+        super().__init__(message)
+        self.imported = imported
 
 
 class FoodBlogDataset:
-    def __init__(self, database_name):
-        self.conn = sqlite3.connect(database_name)
-        self.cursor = self.conn.cursor()
+    def __init__(self, database_name, use_index=False, read_only=False, pool_size=None, cache_size=None,
+                 cache_ttl=None, profile=False):
+        self.database_name = database_name
+        self.read_only = read_only
+        self.pool = None
+        self.conn = None
+        self.cursor = None
+        self.profiler = None
+        self.watcher = None
+        self.watch_lock = threading.Lock()
+        self.data_version = None
+        self.generation = 0
+        self.changed_at = time.time()
+
+        if pool_size:
+            self.pool = ConnectionPool(database_name, pool_size, read_only=read_only)
+            self.conn = self.pool.writer
+        else:
+            self.conn = connect(database_name, read_only=read_only)
+        if self.conn is not None:
+            self.cursor = self.conn.cursor()
+        if profile:
+            self.enable_profiling()
 
-        self.serve_id = 0
         self.recipe_id = 0
-        self.quantity_id = 0
-
-        self.create_tables()
-        self.insert_tables()
-
-    @staticmethod
-    def handle_sql_error(error, message):
-        if "already exists" in str(error):
-            print(f"Table already exists {message}")
+        self.index = None
+        self.dictionary_resolver = None
+        self.resolver_generation = None
+        self.result_cache = ResultCache(cache_size, cache_ttl) if cache_size else None
+        self.incidence = None
+        self.incidence_generation = None
+
+        if read_only:
+            version = self.schema_version()
+            if version < SCHEMA_VERSION:
+                self.close_connection()
+                raise sqlite3.DatabaseError(f"Database {database_name} has schema version {version}, "
+                                            f"expected {SCHEMA_VERSION}")
+        else:
+            self.migrate()
+
+        if use_index:
+            self.load_index()
+
+    def enable_profiling(self, slow_ms=50):
+        self.profiler = Profiler(slow_ms)
+        if self.conn is not None:
+            self.profiler.install(self.conn)
+            self.cursor = self.profiler.cursor(self.conn)
+        if self.pool is not None:
+            self.pool.on_connect = self.profiler.install
+        return self.profiler
+
+    def profile_snapshot(self):
+        if self.profiler is None:
+            return {}
+        return self.profiler.snapshot()
+
+    def profile_reset(self):
+        if self.profiler is not None:
+            self.profiler.reset()
+
+    def new_cursor(self, conn):
+        if self.profiler is None:
+            return conn.cursor()
+        return self.profiler.cursor(conn)
+
+    @contextmanager
+    def reading(self):
+        if self.pool is None:
+            yield self.cursor
+        else:
+            with self.pool.reader() as conn:
+                yield self.new_cursor(conn)
+
+    @contextmanager
+    def streaming(self):
+        # Generators may be suspended between rows, so they never share self.cursor.
+        if self.pool is None:
+            cursor = self.new_cursor(self.conn)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+        else:
+            with self.reading() as cursor:
+                yield cursor
+
+    @contextmanager
+    def read_transaction(self):
+        # Dumps hold one read transaction for as long as they run, so they get their own
+        # connection rather than blocking writes on self.conn or pinning a pool reader.
+        # The journal mode is left alone: writers keep committing meanwhile in WAL mode
+        # (which pool_size turns on), otherwise their commits wait for the dump to end.
+        conn = connect(self.database_name, read_only=True, check_same_thread=False)
+        try:
+            if self.profiler is not None:
+                self.profiler.install(conn)
+            cursor = self.new_cursor(conn)
+            cursor.execute("BEGIN")
+            try:
+                yield cursor
+            finally:
+                conn.rollback()
+        finally:
+            conn.close()
+
+    @contextmanager
+    def writing(self):
+        if self.pool is None:
+            yield self.conn
         else:
-            raise
-
-    def create_tables(self):
-        create_tables_query = '''
-            PRAGMA foreign_keys = ON;
-
-            CREATE TABLE IF NOT EXISTS meals(
-                meal_id INT PRIMARY KEY,
-                meal_name VARCHAR(255) UNIQUE NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS ingredients(
-                ingredient_id INT PRIMARY KEY,
-                ingredient_name VARCHAR(255) UNIQUE NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS measures(
-                measure_id INT PRIMARY KEY,
-                measure_name VARCHAR(255) UNIQUE
-            );
-
-            CREATE TABLE IF NOT EXISTS recipes(
-               recipe_id INT PRIMARY KEY,
-               recipe_name VARCHAR(255) NOT NULL,
-               recipe_description VARCHAR(255)
-            );
-
-            CREATE TABLE IF NOT EXISTS serve(
-                serve_id INT PRIMARY KEY,
-                recipe_id INT NOT NULL,
-                meal_id INT NOT NULL,
-                FOREIGN KEY(recipe_id) REFERENCES recipes(recipe_id)
-                FOREIGN KEY(meal_id) REFERENCES meals(meal_id)
-            );
-
-            CREATE TABLE IF NOT EXISTS quantity(
-                quantity_id INT PRIMARY KEY,
-                measure_id INT NOT NULL,
-                ingredient_id INT NOT NULL,
-                quantity INT NOT NULL,
-                recipe_id INT NOT NULL,
-                FOREIGN KEY(measure_id) REFERENCES measures(measure_id)
-                FOREIGN KEY(ingredient_id) REFERENCES ingredients(ingredient_id)
-                FOREIGN KEY(recipe_id) REFERENCES recipes(recipe_id)
-            );
-        '''
-
-        self.cursor.executescript(create_tables_query)
-        self.conn.commit()
-
-    def insert_tables(self):
+            with self.pool.writing() as conn:
+                yield conn
+
+    @contextmanager
+    def transaction(self):
+        with self.writing() as conn:
+            cursor = self.new_cursor(conn)
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+                self.mark_changed()
+
+    def mark_changed(self):
+        with self.watch_lock:
+            self.generation += 1
+            self.changed_at = time.time()
+
+    def change_counter(self):
+        # PRAGMA data_version only moves for commits made by other connections,
+        # so a dedicated connection sees both our own writes and other processes'.
+        with self.watch_lock:
+            if self.watcher is None:
+                self.watcher = connect(self.database_name, read_only=self.read_only, check_same_thread=False)
+            data_version = self.watcher.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self.data_version:
+                if self.data_version is not None:
+                    self.generation += 1
+                    self.changed_at = time.time()
+                self.data_version = data_version
+            return self.generation
+
+    def schema_version(self):
+        with self.reading() as cursor:
+            return cursor.execute("PRAGMA user_version").fetchone()[0]
+
+    def pool_stats(self):
+        if self.pool is None:
+            return {}
+        return self.pool.stats()
+
+    def health(self):
+        if self.pool is None:
+            self.cursor.execute("SELECT 1").fetchone()
+            return {"ok": True}
+        return self.pool.health()
+
+    def migrate(self):
+        version = self.schema_version()
+        if version >= SCHEMA_VERSION:
+            return
+
+        migrations = [self.create_tables, self.upgrade_primary_keys, self.create_full_text_index,
+                      self.create_measure_units]
+        self.invalidate_resolver()
+
+        # Table rebuilds drop tables that other tables reference.
+        self.cursor.execute("PRAGMA foreign_keys = OFF")
+        try:
+            for target_version, migration in enumerate(migrations[version:], version + 1):
+                with self.transaction() as cursor:
+                    migration(cursor)
+                    cursor.execute(f"PRAGMA user_version = {target_version}")
+        finally:
+            self.cursor.execute("PRAGMA foreign_keys = ON")
+
+    def create_tables(self, cursor):
+        for name, create_table_query in TABLES.items():
+            cursor.execute(create_table_query.format(name=name))
+        self.insert_tables(cursor)
+
+    def insert_tables(self, cursor):
         meals_data = [
             (1, "breakfast"),
             (2, "brunch"),
@@ -96,112 +340,483 @@ class FoodBlogDataset:
             (8, "")
         ]
 
-        self.conn.executemany("INSERT OR REPLACE INTO meals VALUES (?, ?)", meals_data)
-        self.conn.executemany("INSERT OR REPLACE INTO ingredients VALUES (?, ?)", ingredients_data)
-        self.conn.executemany("INSERT OR REPLACE INTO measures VALUES (?, ?)", measures_data)
-        self.conn.commit()
+        cursor.executemany("INSERT OR IGNORE INTO meals VALUES (?, ?)", meals_data)
+        cursor.executemany("INSERT OR IGNORE INTO ingredients VALUES (?, ?)", ingredients_data)
+        cursor.executemany("INSERT OR IGNORE INTO measures VALUES (?, ?)", measures_data)
 
-    def insert_recipe(self, name, description):
-        try:
-            self.cursor.execute("SELECT MAX(recipe_id) FROM recipes")
-            self.conn.commit()
-            last_id = self.cursor.fetchone()[0] or 0
-        except sqlite3.OperationalError as e:
-            self.handle_sql_error(e, "Error retrieving last recipe id")
-            last_id = 0
+    def upgrade_primary_keys(self, cursor):
+        for name, create_table_query in TABLES.items():
+            columns = cursor.execute(f"PRAGMA table_info({name})").fetchall()
+            if any(pk and column_type.upper() == "INT" for _, _, column_type, _, _, pk in columns):
+                cursor.execute(create_table_query.format(name=f"new_{name}"))
+                cursor.execute(f"INSERT INTO new_{name} SELECT * FROM {name}")
+                cursor.execute(f"DROP TABLE {name}")
+                cursor.execute(f"ALTER TABLE new_{name} RENAME TO {name}")
 
-        self.recipe_id = last_id + 1
+        for create_index_query in INDEXES:
+            cursor.execute(create_index_query)
 
-        query = "INSERT INTO recipes VALUES (?, ?, ?);"
-        try:
-            self.cursor.execute(query, (self.recipe_id, name, description))
-            self.conn.commit()
-        except sqlite3.OperationalError as e:
-            self.handle_sql_error(e, f"Error inserting recipe: {name}")
+        if cursor.execute("PRAGMA foreign_key_check").fetchone():
+            raise sqlite3.IntegrityError("Foreign key check failed after upgrading primary keys")
 
-    def insert_quantity(self, user_measure_id, user_ingredient_id, quantity):
-        try:
-            self.cursor.execute("SELECT MAX(quantity_id) FROM quantity")
-            self.conn.commit()
-            last_id = self.cursor.fetchone()[0] or 0
-        except sqlite3.OperationalError as e:
-            self.handle_sql_error(e, "Error retrieving last quantity id")
-            last_id = 0
+    def create_full_text_index(self, cursor):
+        for statement in FULL_TEXT_INDEX:
+            cursor.execute(statement)
 
-        self.quantity_id = last_id + 1
+    def create_measure_units(self, cursor):
+        cursor.execute(MEASURE_UNITS_TABLE)
+        cursor.executemany("INSERT OR IGNORE INTO measure_units (measure_id, base_unit, factor) "
+                           "SELECT measure_id, ?, ? FROM measures WHERE measure_name = ?",
+                           [(base_unit, factor, name) for name, (base_unit, factor) in MEASURE_UNITS.items()])
 
-        query = "INSERT INTO quantity VALUES (?, ?, ?, ?, ?);"
-        try:
-            self.cursor.execute(query,
-                                (self.quantity_id, user_measure_id, user_ingredient_id, quantity, self.recipe_id))
-            self.conn.commit()
-        except sqlite3.OperationalError as e:
-            self.handle_sql_error(e, f"Error inserting quantity: {quantity}")
+    @profiled
+    def add_recipe(self, name, description, meal_ids=(), quantities=()):
+        return self.write_batch([(name, description, list(meal_ids), list(quantities))])[0]
+
+    @profiled
+    def add_to_recipe(self, recipe_id, meal_ids=(), quantities=()):
+        serve_rows = [(recipe_id, meal_id) for meal_id in meal_ids]
+        quantity_rows = [(measure_id, ingredient_id, quantity, recipe_id)
+                         for measure_id, ingredient_id, quantity in quantities]
+
+        with self.transaction() as cursor:
+            self.insert_rows(cursor, serve_rows, quantity_rows)
 
+        self.update_index(serve_rows, quantity_rows)
+
+    @staticmethod
+    def insert_rows(cursor, serve_rows, quantity_rows):
+        cursor.executemany("INSERT INTO serve (recipe_id, meal_id) VALUES (?, ?);", serve_rows)
+        cursor.executemany("INSERT INTO quantity (measure_id, ingredient_id, quantity, recipe_id) "
+                           "VALUES (?, ?, ?, ?);", quantity_rows)
+
+    @profiled
+    def insert_recipe(self, name, description):
+        self.recipe_id = self.add_recipe(name, description)
+        return self.recipe_id
+
+    @profiled
+    def insert_quantity(self, user_measure_id, user_ingredient_id, quantity, recipe_id=None):
+        self.add_to_recipe(recipe_id or self.recipe_id, quantities=[(user_measure_id, user_ingredient_id, quantity)])
+
+    @profiled
+    def list_meals(self):
+        with self.reading() as cursor:
+            cursor.execute("SELECT * FROM meals")
+            return cursor.fetchall()
+
+    @staticmethod
+    def fetch_rows(cursor, batch_size):
+        while rows := cursor.fetchmany(batch_size):
+            yield from rows
+
+    def iter_meals(self, batch_size=500):
+        with self.streaming() as cursor:
+            cursor.execute("SELECT * FROM meals ORDER BY meal_id")
+            yield from self.fetch_rows(cursor, batch_size)
+
+    @profiled
     def available_meals(self):
-        sql_query = "SELECT * FROM meals"
-        self.cursor.execute(sql_query)
-        self.conn.commit()
-        result = self.cursor.fetchall()
-        for row in result:
+        for row in self.iter_meals():
             meal_id, meal_name = row
             print(f"{meal_id}) {meal_name}")
 
+    @profiled
     def available_measures(self):
-        sql_query = "SELECT * FROM measures"
-        self.cursor.execute(sql_query)
-        self.conn.commit()
-        return self.cursor.fetchall()
+        with self.reading() as cursor:
+            cursor.execute("SELECT * FROM measures")
+            return cursor.fetchall()
 
+    @profiled
     def available_ingredients(self):
-        sql_query = "SELECT * FROM ingredients"
-        self.cursor.execute(sql_query)
-        self.conn.commit()
-        return self.cursor.fetchall()
+        with self.reading() as cursor:
+            cursor.execute("SELECT * FROM ingredients")
+            return cursor.fetchall()
+
+    @profiled
+    def meals_to_serve(self, meal_ids: list, recipe_id=None):
+        self.add_to_recipe(recipe_id or self.recipe_id, meal_ids=meal_ids)
+
+    def resolver(self):
+        # Rebuilt after any commit, ours or another process's, so names added to the
+        # dictionaries elsewhere resolve here too.
+        generation = self.change_counter()
+        if self.dictionary_resolver is None or self.resolver_generation != generation:
+            self.dictionary_resolver = DictionaryResolver(self.available_measures(), self.available_ingredients())
+            self.resolver_generation = generation
+        return self.dictionary_resolver
+
+    def invalidate_resolver(self):
+        self.dictionary_resolver = None
+
+    def meal_ids(self):
+        meal_ids = {}
+        for meal_id, meal_name in self.list_meals():
+            meal_ids[meal_name] = meal_id
+            meal_ids[str(meal_id)] = meal_id
+        return meal_ids
+
+    @profiled
+    def bulk_import(self, file_name, batch_size=1000, file_format=None):
+        meal_ids = self.meal_ids()
+        resolver = self.resolver()
+
+        imported = 0
+        batch = []
+        try:
+            for record in read_recipes(file_name, file_format):
+                try:
+                    meals = [meal_ids[meal] for meal in record["meals"]]
+                except KeyError as e:
+                    raise ValueError(f"Line {record['line']}: Unknown meal {e} in recipe: {record['name']}") from None
+                quantities = []
+                for quantity, measure, ingredient in record["quantities"]:
+                    measure_id = resolver.lookup_measure(measure)
+                    if measure_id is None or measure_id is AMBIGUOUS:
+                        raise ValueError(f"Line {record['line']}: The measure {measure!r} is not conclusive "
+                                         f"in recipe: {record['name']}")
+                    ingredient_id = resolver.lookup_ingredient(ingredient)
+                    if ingredient_id is None or ingredient_id is AMBIGUOUS:
+                        raise ValueError(f"Line {record['line']}: The ingredient {ingredient!r} is not conclusive "
+                                         f"in recipe: {record['name']}")
+                    quantities.append((measure_id, ingredient_id, quantity))
+
+                batch.append((record["name"], record["description"], meals, quantities))
+                if len(batch) >= batch_size:
+                    imported += len(self.write_batch(batch))
+                    batch = []
+        except ValueError as e:
+            # Everything before the bad record is kept, so the file can be fixed and
+            # the import resumed after it.
+            if batch:
+                imported += len(self.write_batch(batch))
+            raise BulkImportError(str(e), imported) from e
+
+        if batch:
+            imported += len(self.write_batch(batch))
+        return imported
+
+    @profiled
+    def write_batch(self, recipes):
+        recipe_ids = []
+        serve_rows = []
+        quantity_rows = []
+
+        with self.transaction() as cursor:
+            for name, description, meal_ids, quantities in recipes:
+                cursor.execute("INSERT INTO recipes (recipe_name, recipe_description) VALUES (?, ?);",
+                               (name, description))
+                recipe_id = cursor.lastrowid
+                recipe_ids.append(recipe_id)
+                serve_rows.extend((recipe_id, meal_id) for meal_id in meal_ids)
+                quantity_rows.extend((measure_id, ingredient_id, quantity, recipe_id)
+                                     for measure_id, ingredient_id, quantity in quantities)
+
+            self.insert_rows(cursor, serve_rows, quantity_rows)
+
+        self.update_index(serve_rows, quantity_rows)
+        return recipe_ids
+
+    def update_index(self, serve_rows, quantity_rows):
+        if self.index is None:
+            return
+        self.index.add(ingredient_rows=[(ingredient_id, recipe_id) for _, ingredient_id, _, recipe_id in quantity_rows],
+                       meal_rows=[(meal_id, recipe_id) for recipe_id, meal_id in serve_rows])
+
+    def load_index(self):
+        with self.reading() as cursor:
+            self.index = RecipeIndex(cursor)
+
+    def index_memory_usage(self):
+        if self.index is None:
+            return 0
+        return self.index.memory_usage()
+
+    @profiled
+    def recipe_detail(self, recipe_id):
+        with self.reading() as cursor:
+            cursor.execute("SELECT recipe_id, recipe_name, recipe_description FROM recipes WHERE recipe_id = ?",
+                           (recipe_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            cursor.execute("SELECT meal_name "
+                           "FROM serve "
+                           "JOIN meals "
+                           "ON meals.meal_id = serve.meal_id "
+                           "WHERE recipe_id = ? "
+                           "ORDER BY serve_id", (recipe_id,))
+            meals = [meal_name for meal_name, in cursor.fetchall()]
+
+            cursor.execute("SELECT quantity, measure_name, ingredient_name "
+                           "FROM quantity "
+                           "JOIN measures "
+                           "ON measures.measure_id = quantity.measure_id "
+                           "JOIN ingredients "
+                           "ON ingredients.ingredient_id = quantity.ingredient_id "
+                           "WHERE recipe_id = ? "
+                           "ORDER BY quantity_id", (recipe_id,))
+            quantities = [{"quantity": quantity, "measure": measure_name or "", "ingredient": ingredient_name}
+                          for quantity, measure_name, ingredient_name in cursor.fetchall()]
+
+        return {
+            "id": row[0],
+            "name": row[1],
+            "description": row[2],
+            "meals": meals,
+            "quantities": quantities,
+        }
+
+    def recipe_rows(self, recipe_ids):
+        # One query for any number of ids, returned in the order they were asked for.
+        with self.reading() as cursor:
+            cursor.execute("SELECT recipes.recipe_id, recipes.recipe_name "
+                           "FROM json_each(?) AS ids "
+                           "JOIN recipes "
+                           "ON recipes.recipe_id = ids.value "
+                           "ORDER BY ids.key", (json.dumps(list(recipe_ids)),))
+            return cursor.fetchall()
+
+    @profiled
+    def search_recipes(self, ingredients, meals=None):
+        return [recipe_name for _, recipe_name in self.search_recipe_rows(ingredients, meals)]
+
+    def cache_stats(self):
+        if self.result_cache is None:
+            return {}
+        return self.result_cache.stats()
+
+    @profiled
+    def search_recipe_rows(self, ingredients, meals=None):
+        if self.result_cache is None:
+            return self.query_recipe_rows(ingredients, meals)
+
+        key = (frozenset(ingredients), frozenset(meals or ()))
+        generation = self.change_counter()
+        rows = self.result_cache.get(key, generation)
+        if rows is None:
+            rows = self.query_recipe_rows(ingredients, meals)
+            self.result_cache.put(key, generation, rows)
+        return list(rows)
+
+    def query_recipe_rows(self, ingredients, meals=None):
+        if self.index is not None:
+            return self.recipe_rows(self.index.match(ingredients, meals))
+
+        conditions, parameters = self.recipe_conditions(ingredients, meals)
+        if not conditions:
+            conditions.append("recipe_id IN (SELECT recipe_id FROM quantity)")
+
+        search_query = (f"SELECT recipe_id, recipe_name FROM recipes WHERE {' AND '.join(conditions)} "
+                        "ORDER BY recipe_id;")
+
+        with self.reading() as cursor:
+            cursor.execute(search_query, parameters)
+            return cursor.fetchall()
 
-    def meals_to_serve(self, meal_ids: list):
-        for meal_id in meal_ids:
-            try:
-                self.cursor.execute("SELECT MAX(serve_id) FROM serve")
-                self.conn.commit()
-                last_id = self.cursor.fetchone()[0] or 0
-            except sqlite3.OperationalError as e:
-                self.handle_sql_error(e, "Error retrieving last serve id")
-                last_id = 0
+    @staticmethod
+    def encode_page_token(recipe_id):
+        return base64.urlsafe_b64encode(str(recipe_id).encode()).decode()
 
-            self.serve_id = last_id + 1
+    @staticmethod
+    def decode_page_token(token):
+        try:
+            return int(base64.urlsafe_b64decode(token.encode()).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError(f"Invalid page token: {token!r}") from None
+
+    def iter_recipes(self, ingredients, meals=None, after=None, limit=None, batch_size=500):
+        conditions, parameters = self.recipe_conditions(ingredients, meals)
+        if not conditions:
+            conditions.append("recipes.recipe_id IN (SELECT recipe_id FROM quantity)")
+        if after is not None:
+            conditions.append("recipes.recipe_id > ?")
+            parameters.append(self.decode_page_token(after) if isinstance(after, str) else after)
+
+        search_query = (f"SELECT recipe_id, recipe_name FROM recipes WHERE {' AND '.join(conditions)} "
+                        "ORDER BY recipe_id")
+        if limit is not None:
+            search_query += " LIMIT ?"
+            parameters.append(limit)
+
+        with self.streaming() as cursor:
+            cursor.execute(search_query, parameters)
+            yield from self.fetch_rows(cursor, batch_size)
+
+    @profiled
+    def page_recipes(self, ingredients, meals=None, page_token=None, limit=50):
+        if limit < 1:
+            raise ValueError(f"Page limit must be at least 1, got {limit}")
+        rows = list(self.iter_recipes(ingredients, meals, page_token, limit + 1))
+        next_token = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_token = self.encode_page_token(rows[-1][0])
+        return rows, next_token
+
+    @profiled
+    def search_text(self, text, limit=20, ingredients=None, meals=None):
+        match = full_text_query(text)
+        if match is None:
+            return []
+
+        conditions, parameters = self.recipe_conditions(ingredients or [], meals)
+        conditions.insert(0, "recipes_fts MATCH ?")
+        parameters.insert(0, match)
+        parameters.append(limit)
+
+        search_query = ("SELECT recipes.recipe_id, recipes.recipe_name "
+                        "FROM recipes_fts "
+                        "JOIN recipes "
+                        "ON recipes.recipe_id = recipes_fts.rowid "
+                        f"WHERE {' AND '.join(conditions)} "
+                        "ORDER BY bm25(recipes_fts) "
+                        "LIMIT ?;")
+
+        with self.reading() as cursor:
+            cursor.execute(search_query, parameters)
+            return cursor.fetchall()
 
-            query = "INSERT OR REPLACE INTO serve VALUES (?, ?, ?);"
+    @staticmethod
+    def recipe_conditions(ingredients, meals=None):
+        ingredients = set(ingredients)
+        conditions = []
+        parameters = []
+
+        if ingredients:
+            placeholders = ", ".join("?" * len(ingredients))
+            conditions.append("recipes.recipe_id IN ("
+                              "SELECT quantity.recipe_id "
+                              "FROM ingredients "
+                              "JOIN quantity "
+                              "ON quantity.ingredient_id = ingredients.ingredient_id "
+                              f"WHERE ingredient_name IN ({placeholders}) "
+                              "GROUP BY quantity.recipe_id "
+                              "HAVING COUNT(DISTINCT quantity.ingredient_id) = ?)")
+            parameters.extend(ingredients)
+            parameters.append(len(ingredients))
+
+        if meals:
+            meals = set(meals)
+            placeholders = ", ".join("?" * len(meals))
+            conditions.append("recipes.recipe_id IN ("
+                              "SELECT serve.recipe_id "
+                              "FROM meals "
+                              "JOIN serve "
+                              "ON serve.meal_id = meals.meal_id "
+                              f"WHERE meal_name IN ({placeholders}))")
+            parameters.extend(meals)
+
+        return conditions, parameters
+
+    def find_recipes_batch(self, queries, workers=None, chunk_size=500):
+        index = self.index
+        if index is None:
+            with self.reading() as cursor:
+                index = RecipeIndex(cursor)
+
+        with self.reading() as cursor:
+            cursor.execute("SELECT recipe_id, recipe_name FROM recipes")
+            names = dict(cursor.fetchall())
+
+        for query_id, recipe_ids in match_batch(index, queries, workers, chunk_size):
+            yield query_id, [names[recipe_id] for recipe_id in recipe_ids if recipe_id in names]
+
+    def incidence_matrix(self):
+        generation = self.change_counter()
+        if self.incidence is None or self.incidence_generation != generation:
+            with self.reading() as cursor:
+                self.incidence = IncidenceMatrix(cursor)
+            self.incidence_generation = generation
+        return self.incidence
+
+    @profiled
+    def rank_recipes(self, ingredients, limit=10):
+        pantry = set(ingredients)
+        ingredient_ids = self.resolver().ingredient_ids
+        ranked = self.incidence_matrix().rank([ingredient_ids[name] for name in pantry if name in ingredient_ids],
+                                              len(pantry), limit)
+        names = dict(self.recipe_rows([recipe_id for recipe_id, _, _, _ in ranked]))
+        return [{"id": recipe_id, "name": names[recipe_id], "matched": matched, "missing": missing, "extra": extra}
+                for recipe_id, matched, missing, extra in ranked if recipe_id in names]
+
+    def aggregate_ingredients(self, recipe_ids, batch_size=500):
+        # The whole plan goes in as one JSON parameter, so a plan of thousands of
+        # recipes needs neither chunking nor a temporary table on read-only readers.
+        # A recipe listed twice in the plan is cooked twice.
+        with self.streaming() as cursor:
+            cursor.execute("""
+                WITH plan(recipe_id, servings) AS (
+                    SELECT value, COUNT(*) FROM json_each(?) GROUP BY value
+                )
+                SELECT ingredients.ingredient_name,
+                       COALESCE(measure_units.base_unit, measures.measure_name) AS unit,
+                       SUM(quantity.quantity * COALESCE(measure_units.factor, 1) * plan.servings)
+                FROM plan
+                JOIN quantity ON quantity.recipe_id = plan.recipe_id
+                JOIN ingredients ON ingredients.ingredient_id = quantity.ingredient_id
+                JOIN measures ON measures.measure_id = quantity.measure_id
+                LEFT JOIN measure_units ON measure_units.measure_id = quantity.measure_id
+                GROUP BY quantity.ingredient_id, unit
+                ORDER BY ingredients.ingredient_name, unit
+            """, (json.dumps([int(recipe_id) for recipe_id in recipe_ids]),))
+            yield from self.fetch_rows(cursor, batch_size)
+
+    def export(self, after_id=0, batch_size=500):
+        # Recipes, meals and quantities are read as three recipe-ordered streams and
+        # merged, all in one read transaction so the dump is a consistent point in time.
+        with self.read_transaction() as cursor:
+            serve_cursor = self.new_cursor(cursor.connection)
+            quantity_cursor = self.new_cursor(cursor.connection)
             try:
-                self.cursor.execute(query, (self.serve_id, self.recipe_id, meal_id))
-                self.conn.commit()
-            except sqlite3.OperationalError as e:
-                self.handle_sql_error(e, f"Error inserting serve: {self.serve_id}")
-
-    def find_recipe(self, ingredients):
-        join_query = ("SELECT quantity.recipe_id, recipe_name, ingredient_name "
-                      "FROM quantity "
-                      "LEFT JOIN ingredients "
-                      "ON quantity.ingredient_id = ingredients.ingredient_id "
-                      "LEFT JOIN recipes "
-                      "ON recipes.recipe_id = quantity.recipe_id;")
-
-        self.cursor.execute(join_query)
-        self.conn.commit()
-        recipe_ingredient_list = self.cursor.fetchall()
-
-        recipes_dict = {}
-
-        for recipe_id, recipe_name, ingredient in recipe_ingredient_list:
-            if (recipe_id, recipe_name) in recipes_dict:
-                recipes_dict[(recipe_id, recipe_name)].append(ingredient)
-            else:
-                recipes_dict[(recipe_id, recipe_name)] = [ingredient]
-
-        found_recipes = []
-        for key, value in recipes_dict.items():
-            if set(ingredients).issubset(set(value)):
-                found_recipes.append(key[1])
+                cursor.execute("SELECT recipe_id, recipe_name, recipe_description FROM recipes "
+                               "WHERE recipe_id > ? ORDER BY recipe_id", (after_id,))
+                serve_cursor.execute("SELECT recipe_id, meal_name "
+                                     "FROM serve "
+                                     "JOIN meals "
+                                     "ON meals.meal_id = serve.meal_id "
+                                     "WHERE recipe_id > ? "
+                                     "ORDER BY recipe_id, serve_id", (after_id,))
+                quantity_cursor.execute("SELECT recipe_id, quantity, measure_name, ingredient_name "
+                                        "FROM quantity "
+                                        "JOIN measures "
+                                        "ON measures.measure_id = quantity.measure_id "
+                                        "JOIN ingredients "
+                                        "ON ingredients.ingredient_id = quantity.ingredient_id "
+                                        "WHERE recipe_id > ? "
+                                        "ORDER BY recipe_id, quantity_id", (after_id,))
+
+                serve_rows = self.fetch_rows(serve_cursor, batch_size)
+                quantity_rows = self.fetch_rows(quantity_cursor, batch_size)
+                serve_row = next(serve_rows, None)
+                quantity_row = next(quantity_rows, None)
+                for recipe_id, recipe_name, recipe_description in self.fetch_rows(cursor, batch_size):
+                    meals = []
+                    while serve_row is not None and serve_row[0] <= recipe_id:
+                        if serve_row[0] == recipe_id:
+                            meals.append(serve_row[1])
+                        serve_row = next(serve_rows, None)
+                    quantities = []
+                    while quantity_row is not None and quantity_row[0] <= recipe_id:
+                        if quantity_row[0] == recipe_id:
+                            quantities.append((quantity_row[1], quantity_row[2] or "", quantity_row[3]))
+                        quantity_row = next(quantity_rows, None)
+
+                    yield {
+                        "id": recipe_id,
+                        "name": recipe_name,
+                        "description": recipe_description,
+                        "meals": meals,
+                        "quantities": quantities,
+                    }
+            finally:
+                serve_cursor.close()
+                quantity_cursor.close()
+
+    @profiled
+    def find_recipe(self, ingredients, meals=None):
+        found_recipes = self.search_recipes(ingredients, meals)
 
         if found_recipes:
             print(f"Recipes selected for you: {', '.join(found_recipes)}")
@@ -209,4 +824,9 @@ class FoodBlogDataset:
             print("There are no such recipes in the database.")
 
     def close_connection(self):
-        self.conn.close()
+        if self.watcher is not None:
+            self.watcher.close()
+        if self.pool is None:
+            self.conn.close()
+        else:
+            self.pool.close()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def split_list(values):
+    return [item for value in values for item in value.split(",") if item]
+
+
+class ResponseCache:
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != generation:
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, generation, status, body):
+        entry = (generation, status, body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return entry
+
+
+class FoodBlogRequestHandler(BaseHTTPRequestHandler):
+    server_version = "FoodBlog/1.0"
+
+    def do_GET(self):
+        database = self.server.database
+        generation = database.change_counter()
+        url = urlsplit(self.path)
+        key = f"{url.path}?{url.query}"
+
+        entry = self.server.cache.get(key, generation)
+        if entry is None:
+            try:
+                status, payload = self.route(url.path, parse_qs(url.query))
+            except Exception as e:
+                # Failures are not cached, the next request tries the database again.
+                self.log_error("%s failed: %r", self.path, e)
+                self.send_body(500, json.dumps({"error": "Internal server error"}).encode("utf-8"))
+                return
+            body = json.dumps(payload).encode("utf-8")
+            entry = self.server.cache.put(key, generation, status, body)
+        _, status, body, etag = entry
+
+        last_modified = formatdate(database.changed_at, usegmt=True)
+        if status == 200 and self.not_modified(etag, database.changed_at):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return
+
+        self.send_body(status, body, {"ETag": etag, "Last-Modified": last_modified})
+
+    def send_body(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def not_modified(self, etag, changed_at):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                return int(changed_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def route(self, path, query):
+        database = self.server.database
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["recipes"]:
+            ingredients = split_list(query.get("ingredients", []))
+            meals = split_list(query.get("meals", [])) or None
+            rows = database.search_recipe_rows(ingredients, meals)
+            return 200, {"recipes": [{"id": recipe_id, "name": recipe_name} for recipe_id, recipe_name in rows]}
+
+        if len(parts) == 2 and parts[0] == "recipes":
+            if not parts[1].isdigit():
+                return 404, {"error": "Recipe not found"}
+            recipe = database.recipe_detail(int(parts[1]))
+            if recipe is None:
+                return 404, {"error": "Recipe not found"}
+            return 200, recipe
+
+        if parts == ["meals"]:
+            return 200, {"meals": [{"id": meal_id, "name": meal_name} for meal_id, meal_name in database.list_meals()]}
+
+        if parts == ["measures"]:
+            return 200, {"measures": [{"id": measure_id, "name": measure_name or ""}
+                                      for measure_id, measure_name in database.available_measures()]}
+
+        if parts == ["ingredients"]:
+            return 200, {"ingredients": [{"id": ingredient_id, "name": ingredient_name}
+                                         for ingredient_id, ingredient_name in database.available_ingredients()]}
+
+        return 404, {"error": "Not found"}
+
+
+class FoodBlogServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, database, cache_size=1024):
+        super().__init__(address, FoodBlogRequestHandler)
+        self.database = database
+        self.cache = ResponseCache(cache_size)
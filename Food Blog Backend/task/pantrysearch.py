@@ -0,0 +1,66 @@
+import heapq
+from array import array
+from collections import Counter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Recipe x ingredient incidence stored column-wise: for every ingredient the
+# positions of the recipes that use it, plus the ingredient count of each recipe.
+class IncidenceMatrix:
+    def __init__(self, cursor):
+        cursor.execute("SELECT recipe_id FROM recipes ORDER BY recipe_id")
+        self.recipe_ids = array("q", (recipe_id for recipe_id, in cursor))
+        positions = {recipe_id: position for position, recipe_id in enumerate(self.recipe_ids)}
+
+        self.columns = {}
+        sizes = array("l", [0]) * len(self.recipe_ids)
+        cursor.execute("SELECT DISTINCT ingredient_id, recipe_id FROM quantity ORDER BY ingredient_id, recipe_id")
+        for ingredient_id, recipe_id in cursor:
+            position = positions[recipe_id]
+            self.columns.setdefault(ingredient_id, array("l")).append(position)
+            sizes[position] += 1
+
+        self.sizes = sizes
+        if numpy is not None:
+            self.recipe_ids = numpy.frombuffer(self.recipe_ids, dtype="q")
+            self.sizes = numpy.frombuffer(sizes, dtype="l").astype(numpy.int64)
+            self.columns = {ingredient_id: numpy.frombuffer(column, dtype="l")
+                            for ingredient_id, column in self.columns.items()}
+
+    def rank(self, ingredient_ids, pantry_size, limit=10):
+        columns = [self.columns[ingredient_id] for ingredient_id in set(ingredient_ids) if ingredient_id in self.columns]
+        if not columns or limit <= 0:
+            return []
+        if numpy is None:
+            return self.rank_python(columns, pantry_size, limit)
+        return self.rank_numpy(columns, pantry_size, limit)
+
+    def rank_numpy(self, columns, pantry_size, limit):
+        matched = numpy.bincount(numpy.concatenate(columns), minlength=len(self.recipe_ids))
+        candidates = numpy.flatnonzero(matched)
+        missing = self.sizes[candidates] - matched[candidates]
+        extra = pantry_size - matched[candidates]
+
+        # One integer key orders by missing, then extra, then recipe position.
+        keys = (missing * (pantry_size + 1) + extra) * len(self.recipe_ids) + candidates
+        if len(keys) > limit:
+            keys = keys[numpy.argpartition(keys, limit)[:limit]]
+        keys.sort()
+
+        positions = keys % len(self.recipe_ids)
+        return [(int(self.recipe_ids[position]), int(matched[position]), int(self.sizes[position] - matched[position]),
+                 int(pantry_size - matched[position])) for position in positions]
+
+    def rank_python(self, columns, pantry_size, limit):
+        matched = Counter()
+        for column in columns:
+            matched.update(column)
+
+        best = heapq.nsmallest(limit, matched.items(), key=lambda item: (self.sizes[item[0]] - item[1],
+                                                                          pantry_size - item[1], item[0]))
+        return [(self.recipe_ids[position], count, self.sizes[position] - count, pantry_size - count)
+                for position, count in best]
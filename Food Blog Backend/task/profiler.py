@@ -0,0 +1,166 @@
+import functools
+import re
+import sqlite3
+import threading
+import time
+
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf")]
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+TRANSACTION = ("BEGIN", "COMMIT", "END", "ROLLBACK")
+
+
+def normalize_sql(sql):
+    return LITERAL.sub("?", " ".join(sql.split()))
+
+
+def profiled(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.profiler.record_method(method.__name__, time.perf_counter() - started)
+    return wrapper
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for position, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[position] += 1
+                break
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "buckets": {f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.buckets)},
+        }
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    def __init__(self, connection, profiler):
+        super().__init__(connection)
+        self.profiler = profiler
+
+    def execute(self, sql, parameters=()):
+        self.profiler.local.sql = sql
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.profiler.local.sql = None
+            self.profiler.record_statement(self.connection, sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self.profiler.local.sql = sql
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.profiler.local.sql = None
+            self.profiler.record_statement(self.connection, sql, None, time.perf_counter() - started,
+                                           len(seq_of_parameters))
+
+
+class Profiler:
+    def __init__(self, slow_ms=50):
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.methods = {}
+            self.statements = {}
+            self.slow_plans = {}
+
+    def install(self, conn):
+        conn.set_trace_callback(self.trace)
+
+    def cursor(self, conn):
+        return conn.cursor(functools.partial(ProfilingCursor, profiler=self))
+
+    def statement(self, sql):
+        sql = normalize_sql(sql)
+        if sql not in self.statements:
+            self.statements[sql] = {"executed": 0, "timed": 0, "total_ms": 0.0, "max_ms": 0.0}
+        return self.statements[sql]
+
+    def trace(self, sql):
+        # Only counts the BEGIN/COMMIT the sqlite3 module issues on its own. Statements
+        # run through a ProfilingCursor are counted there; trigger programs and FTS5's
+        # internal statements ("-- ...") would otherwise be counted as extra executions.
+        if sql.startswith("--") or sql == getattr(self.local, "sql", None):
+            return
+        if not sql.lstrip().upper().startswith(TRANSACTION):
+            return
+        with self.lock:
+            self.statement(sql)["executed"] += 1
+
+    def record_method(self, name, elapsed):
+        with self.lock:
+            self.methods.setdefault(name, LatencyHistogram()).add(elapsed * 1000)
+
+    def record_statement(self, conn, sql, parameters, elapsed, executions=1):
+        elapsed_ms = elapsed * 1000
+        with self.lock:
+            statement = self.statement(sql)
+            statement["executed"] += executions
+            statement["timed"] += 1
+            statement["total_ms"] += elapsed_ms
+            statement["max_ms"] = max(statement["max_ms"], elapsed_ms)
+            explain = (elapsed_ms >= self.slow_ms and parameters is not None
+                       and normalize_sql(sql) not in self.slow_plans
+                       and sql.lstrip().upper().startswith(EXPLAINABLE))
+
+        if explain:
+            try:
+                plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()]
+            except sqlite3.Error as e:
+                plan = [f"EXPLAIN failed: {e}"]
+            with self.lock:
+                self.slow_plans[normalize_sql(sql)] = {"ms": elapsed_ms, "plan": plan}
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "methods": {name: histogram.snapshot() for name, histogram in self.methods.items()},
+                "statements": {sql: dict(statement) for sql, statement in self.statements.items()},
+                "slow_plans": {sql: dict(plan) for sql, plan in self.slow_plans.items()},
+            }
+
+    def summary(self):
+        snapshot = self.snapshot()
+        lines = ["Method latency:"]
+        for name, histogram in sorted(snapshot["methods"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"  {name}: {histogram['count']} calls, {histogram['total_ms']:.2f} ms total, "
+                         f"{histogram['mean_ms']:.3f} ms mean, {histogram['max_ms']:.3f} ms max")
+
+        lines.append("SQL statements:")
+        for sql, statement in sorted(snapshot["statements"].items(), key=lambda item: -item[1]["executed"]):
+            lines.append(f"  {statement['executed']}x {statement['total_ms']:.2f} ms  {sql}")
+
+        if snapshot["slow_plans"]:
+            lines.append(f"Slow statements (>= {self.slow_ms} ms):")
+            for sql, plan in snapshot["slow_plans"].items():
+                lines.append(f"  {plan['ms']:.2f} ms  {sql}")
+                lines.extend(f"    {step}" for step in plan["plan"])
+        return "\n".join(lines)
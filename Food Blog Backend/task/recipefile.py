@@ -0,0 +1,132 @@
+import csv
+import gzip
+import json
+import os
+
+CSV_FIELDS = ["recipe_name", "recipe_description", "meals", "quantities"]
+
+
+def detect_format(file_name):
+    if file_name.endswith(".gz"):
+        file_name = file_name[:-len(".gz")]
+    if file_name.endswith(".csv"):
+        return "csv"
+    return "jsonl"
+
+
+def parse_quantity(text):
+    parts = text.split()
+    if len(parts) == 3:
+        quantity, measure, ingredient = parts
+    elif len(parts) == 2:
+        quantity, ingredient = parts
+        measure = ""
+    else:
+        raise ValueError(f"Wrong quantity: {text!r}")
+    return int(quantity), measure, ingredient
+
+
+def normalize_quantity(item):
+    if isinstance(item, str):
+        return parse_quantity(item)
+    return int(item["quantity"]), item.get("measure") or "", item["ingredient"]
+
+
+def read_jsonl(file):
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            yield {
+                "line": line_number,
+                "name": item["name"],
+                "description": item.get("description"),
+                "meals": [str(meal) for meal in item.get("meals", [])],
+                "quantities": [normalize_quantity(quantity) for quantity in item.get("quantities", [])],
+            }
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Line {line_number}: {e}") from e
+
+
+def read_csv(file):
+    for line_number, row in enumerate(csv.DictReader(file), 2):
+        try:
+            yield {
+                "line": line_number,
+                "name": row["recipe_name"],
+                "description": row.get("recipe_description"),
+                "meals": (row.get("meals") or "").split(),
+                "quantities": [parse_quantity(quantity) for quantity in (row.get("quantities") or "").split(";")
+                               if quantity.strip()],
+            }
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Line {line_number}: {e}") from e
+
+
+def open_recipe_file(file_name, mode, compress=False):
+    if compress:
+        return gzip.open(file_name, mode + "t", newline="", encoding="utf-8")
+    return open(file_name, mode, newline="", encoding="utf-8")
+
+
+def read_recipes(file_name, file_format=None):
+    file_format = file_format or detect_format(file_name)
+    with open_recipe_file(file_name, "r", file_name.endswith(".gz")) as file:
+        if file_format == "csv":
+            yield from read_csv(file)
+        elif file_format == "jsonl":
+            yield from read_jsonl(file)
+        else:
+            raise ValueError(f"Unknown format: {file_format}")
+
+
+def format_quantity(quantity, measure, ingredient):
+    return " ".join(str(part) for part in (quantity, measure, ingredient) if part != "")
+
+
+def jsonl_line(record):
+    return json.dumps({
+        "id": record["id"],
+        "name": record["name"],
+        "description": record["description"],
+        "meals": record["meals"],
+        "quantities": [{"quantity": quantity, "measure": measure, "ingredient": ingredient}
+                       for quantity, measure, ingredient in record["quantities"]],
+    }) + "\n"
+
+
+def csv_row(record):
+    return {
+        "recipe_id": record["id"],
+        "recipe_name": record["name"],
+        "recipe_description": record["description"],
+        "meals": " ".join(record["meals"]),
+        "quantities": ";".join(format_quantity(*quantity) for quantity in record["quantities"]),
+    }
+
+
+def write_recipes(file_name, records, file_format=None, compress=None):
+    file_format = file_format or detect_format(file_name)
+    if file_format not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown format: {file_format}")
+    if compress is None:
+        compress = file_name.endswith(".gz")
+
+    # A half-written dump never replaces a previous good one.
+    exported = 0
+    last_id = None
+    temporary_name = f"{file_name}.tmp"
+    with open_recipe_file(temporary_name, "w", compress) as file:
+        if file_format == "csv":
+            writer = csv.DictWriter(file, ["recipe_id"] + CSV_FIELDS)
+            writer.writeheader()
+        for record in records:
+            if file_format == "csv":
+                writer.writerow(csv_row(record))
+            else:
+                file.write(jsonl_line(record))
+            exported += 1
+            last_id = record["id"]
+    os.replace(temporary_name, file_name)
+    return exported, last_id
@@ -0,0 +1,110 @@
+import sys
+import threading
+
+BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+class RecipeIndex:
+    def __init__(self, cursor):
+        self.lock = threading.Lock()
+        self.ingredient_ids = {}
+        self.meal_ids = {}
+        self.ingredient_bits = {}
+        self.meal_bits = {}
+
+        self.load(cursor)
+
+    @staticmethod
+    def bit_ids(bits):
+        # Walks the bitset a byte at a time; shifting or masking the int itself
+        # would copy the whole catalog-sized number for every set bit.
+        ids = []
+        for position, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+            if byte:
+                base = position * 8
+                ids.extend(base + bit for bit in BYTE_BITS[byte])
+        return ids
+
+    @staticmethod
+    def build_bits(recipe_ids):
+        if not recipe_ids:
+            return 0
+        buffer = bytearray(max(recipe_ids) // 8 + 1)
+        for recipe_id in recipe_ids:
+            buffer[recipe_id >> 3] |= 1 << (recipe_id & 7)
+        return int.from_bytes(buffer, "little")
+
+    @staticmethod
+    def group(rows):
+        groups = {}
+        for key, recipe_id in rows:
+            groups.setdefault(key, []).append(recipe_id)
+        return groups
+
+    def load(self, cursor):
+        cursor.execute("SELECT ingredient_id, ingredient_name FROM ingredients")
+        self.ingredient_ids = {name: ingredient_id for ingredient_id, name in cursor.fetchall()}
+
+        cursor.execute("SELECT meal_id, meal_name FROM meals")
+        self.meal_ids = {name: meal_id for meal_id, name in cursor.fetchall()}
+
+        cursor.execute("SELECT ingredient_id, recipe_id FROM quantity")
+        ingredient_bits = {ingredient_id: self.build_bits(recipe_ids)
+                           for ingredient_id, recipe_ids in self.group(cursor).items()}
+
+        cursor.execute("SELECT meal_id, recipe_id FROM serve")
+        meal_bits = {meal_id: self.build_bits(recipe_ids) for meal_id, recipe_ids in self.group(cursor).items()}
+
+        with self.lock:
+            self.ingredient_bits = ingredient_bits
+            self.meal_bits = meal_bits
+
+    def add(self, ingredient_rows=(), meal_rows=()):
+        # One OR per ingredient or meal touched, however many rows a batch holds.
+        ingredient_groups = self.group(ingredient_rows)
+        meal_groups = self.group(meal_rows)
+        with self.lock:
+            for ingredient_id, recipe_ids in ingredient_groups.items():
+                self.ingredient_bits[ingredient_id] = (self.ingredient_bits.get(ingredient_id, 0)
+                                                       | self.build_bits(recipe_ids))
+            for meal_id, recipe_ids in meal_groups.items():
+                self.meal_bits[meal_id] = self.meal_bits.get(meal_id, 0) | self.build_bits(recipe_ids)
+
+    def match(self, ingredients, meals=None):
+        ingredients = set(ingredients)
+
+        if ingredients:
+            bits = -1
+            for ingredient in ingredients:
+                ingredient_id = self.ingredient_ids.get(ingredient)
+                bits &= self.ingredient_bits.get(ingredient_id, 0)
+                if not bits:
+                    return []
+        else:
+            bits = 0
+            for ingredient_bits in self.ingredient_bits.values():
+                bits |= ingredient_bits
+
+        if meals:
+            meal_bits = 0
+            for meal in set(meals):
+                meal_bits |= self.meal_bits.get(self.meal_ids.get(meal), 0)
+            bits &= meal_bits
+
+        return self.bit_ids(bits)
+
+    def memory_usage(self):
+        size = sys.getsizeof(self.ingredient_bits) + sys.getsizeof(self.meal_bits)
+        size += sys.getsizeof(self.ingredient_ids) + sys.getsizeof(self.meal_ids)
+        size += sum(sys.getsizeof(bits) for bits in self.ingredient_bits.values())
+        size += sum(sys.getsizeof(bits) for bits in self.meal_bits.values())
+        return size
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
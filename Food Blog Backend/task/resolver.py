@@ -0,0 +1,87 @@
+from bisect import bisect_left
+
+AMBIGUOUS = object()
+
+
+def add_match(matches, item_id):
+    # Two ids are enough to tell a unique match from an ambiguous one.
+    if item_id not in matches and len(matches) < 2:
+        matches.append(item_id)
+
+
+def conclusive(matches):
+    if not matches:
+        return None
+    if len(matches) > 1:
+        return AMBIGUOUS
+    return matches[0]
+
+
+class PrefixTrie:
+    def __init__(self, items=()):
+        self.root = {"matches": [], "children": {}}
+        for item_id, name in items:
+            self.add(item_id, name)
+
+    def add(self, item_id, name):
+        node = self.root
+        add_match(node["matches"], item_id)
+        for char in name:
+            node = node["children"].setdefault(char, {"matches": [], "children": {}})
+            add_match(node["matches"], item_id)
+
+    def find(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node["children"].get(char)
+            if node is None:
+                return []
+        return node["matches"]
+
+
+class SubstringIndex:
+    # Every substring of a name is a prefix of one of its suffixes, so a sorted
+    # suffix list answers substring queries with a binary search.
+    def __init__(self, items=()):
+        suffixes = {(name[start:], item_id) for item_id, name in items for start in range(len(name))}
+        suffixes = sorted(suffixes)
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.ids = [item_id for _, item_id in suffixes]
+
+    def find(self, substring):
+        matches = []
+        position = bisect_left(self.suffixes, substring)
+        while position < len(self.suffixes) and self.suffixes[position].startswith(substring):
+            add_match(matches, self.ids[position])
+            if len(matches) > 1:
+                break
+            position += 1
+        return matches
+
+
+class DictionaryResolver:
+    def __init__(self, measures, ingredients):
+        measures = [(measure_id, measure_name or "") for measure_id, measure_name in measures]
+
+        self.measure_ids = {measure_name: measure_id for measure_id, measure_name in measures}
+        self.ingredient_ids = {ingredient_name: ingredient_id for ingredient_id, ingredient_name in ingredients}
+        self.measures = PrefixTrie(measures)
+        self.ingredients = SubstringIndex(ingredients)
+
+    def resolve_measure(self, prefix):
+        return conclusive(self.measures.find(prefix))
+
+    def resolve_ingredient(self, substring):
+        return conclusive(self.ingredients.find(substring))
+
+    def lookup_measure(self, name):
+        measure_id = self.measure_ids.get(name)
+        if measure_id is None:
+            return self.resolve_measure(name)
+        return measure_id
+
+    def lookup_ingredient(self, name):
+        ingredient_id = self.ingredient_ids.get(name)
+        if ingredient_id is None:
+            return self.resolve_ingredient(name)
+        return ingredient_id
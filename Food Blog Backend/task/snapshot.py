@@ -0,0 +1,163 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+MAGIC = b"FBSNAP\0\0"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<8sIIB7x")
+SECTION = struct.Struct("<8sQQ")
+BYTE_ORDERS = {"little": 0, "big": 1}
+
+
+def is_snapshot(file_name):
+    try:
+        with open(file_name, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def string_table(strings):
+    offsets = array("I", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += (string or "").encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def posting_lists(cursor, query, keys):
+    postings = {}
+    cursor.execute(query)
+    for key, recipe_id in cursor:
+        postings.setdefault(key, array("I")).append(recipe_id)
+
+    offsets = array("I", [0])
+    values = array("I")
+    for key in keys:
+        values.extend(postings.get(key, ()))
+        offsets.append(len(values))
+    return offsets, values
+
+
+def write_snapshot(database, file_name):
+    sections = []
+    with database.read_transaction() as cursor:
+        for prefix, table, id_column, name_column in (("REC", "recipes", "recipe_id", "recipe_name"),
+                                                      ("ING", "ingredients", "ingredient_id", "ingredient_name"),
+                                                      ("MEAL", "meals", "meal_id", "meal_name")):
+            cursor.execute(f"SELECT {id_column}, {name_column} FROM {table} ORDER BY {id_column}")
+            rows = cursor.fetchall()
+            ids = array("I", (row_id for row_id, _ in rows))
+            name_offsets, names = string_table(name for _, name in rows)
+            sections += [(f"{prefix}IDS", ids), (f"{prefix}NOFF", name_offsets), (f"{prefix}NAME", names)]
+
+            if table != "recipes":
+                relation = "quantity" if table == "ingredients" else "serve"
+                offsets, values = posting_lists(
+                    cursor, f"SELECT DISTINCT {id_column}, recipe_id FROM {relation} ORDER BY {id_column}, recipe_id",
+                    ids)
+                sections += [(f"{prefix}POFF", offsets), (f"{prefix}POST", values)]
+
+    temporary_name = f"{file_name}.tmp"
+    with open(temporary_name, "wb") as file:
+        position = HEADER.size + SECTION.size * len(sections)
+        table = []
+        for name, data in sections:
+            position += -position % 8
+            data = data.tobytes() if isinstance(data, array) else data
+            table.append((name, position, data))
+            position += len(data)
+
+        file.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(sections), BYTE_ORDERS[sys.byteorder]))
+        for name, offset, data in table:
+            file.write(SECTION.pack(name.encode("ascii"), offset, len(data)))
+        for name, offset, data in table:
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(data)
+    os.replace(temporary_name, file_name)
+
+
+class Snapshot:
+    def __init__(self, file_name):
+        with open(file_name, "rb") as file:
+            self.mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mapping)
+
+        magic, version, section_count, byte_order = (HEADER.unpack_from(self.buffer)
+                                                     if len(self.buffer) >= HEADER.size else (None, 0, 0, 0))
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{file_name} is not a food blog snapshot")
+        if version != SNAPSHOT_VERSION or byte_order != BYTE_ORDERS[sys.byteorder]:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version} in {file_name}")
+
+        self.sections = {}
+        for number in range(section_count):
+            name, offset, length = SECTION.unpack_from(self.buffer, HEADER.size + SECTION.size * number)
+            self.sections[name.rstrip(b"\0").decode("ascii")] = self.buffer[offset:offset + length]
+
+        self.arrays = {name: section.cast("I") for name, section in self.sections.items()
+                       if not name.endswith("NAME")}
+        self.recipe_ids = self.arrays["RECIDS"]
+        self.ingredient_ids = self.dictionary("ING")
+        self.meal_ids = self.dictionary("MEAL")
+
+    def dictionary(self, prefix):
+        offsets = self.arrays[f"{prefix}NOFF"]
+        names = self.sections[f"{prefix}NAME"]
+        return {bytes(names[offsets[position]:offsets[position + 1]]).decode("utf-8"): position
+                for position in range(len(offsets) - 1)}
+
+    def name(self, prefix, position):
+        offsets = self.arrays[f"{prefix}NOFF"]
+        return bytes(self.sections[f"{prefix}NAME"][offsets[position]:offsets[position + 1]]).decode("utf-8")
+
+    def postings(self, prefix, position):
+        offsets = self.arrays[f"{prefix}POFF"]
+        return self.arrays[f"{prefix}POST"][offsets[position]:offsets[position + 1]]
+
+    @staticmethod
+    def contains(sorted_ids, recipe_id):
+        position = bisect_left(sorted_ids, recipe_id)
+        return position < len(sorted_ids) and sorted_ids[position] == recipe_id
+
+    def search_recipe_rows(self, ingredients, meals=None):
+        ingredients = set(ingredients)
+        if any(ingredient not in self.ingredient_ids for ingredient in ingredients):
+            return []
+
+        lists = sorted((self.postings("ING", self.ingredient_ids[ingredient]) for ingredient in ingredients), key=len)
+        meal_lists = None
+        if meals:
+            meal_lists = [self.postings("MEAL", self.meal_ids[meal]) for meal in set(meals) if meal in self.meal_ids]
+
+        if lists:
+            candidates = lists[0]
+        else:
+            candidates = sorted({recipe_id for position in range(len(self.ingredient_ids))
+                                 for recipe_id in self.postings("ING", position)})
+
+        rows = []
+        for recipe_id in candidates:
+            if not all(self.contains(other, recipe_id) for other in lists[1:]):
+                continue
+            if meal_lists is not None and not any(self.contains(other, recipe_id) for other in meal_lists):
+                continue
+            rows.append((recipe_id, self.name("REC", bisect_left(self.recipe_ids, recipe_id))))
+        return rows
+
+    def search_recipes(self, ingredients, meals=None):
+        return [recipe_name for _, recipe_name in self.search_recipe_rows(ingredients, meals)]
+
+    def close(self):
+        for view in getattr(self, "arrays", {}).values():
+            view.release()
+        for section in getattr(self, "sections", {}).values():
+            section.release()
+        self.buffer.release()
+        self.mapping.close()
@@ -0,0 +1,19 @@
+import os
+import tempfile
+import unittest
+from foodblogdataset import FoodBlogDataset
+
+
+class DatabaseTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def open_database(self, file_name="food_blog.db", **kwargs):
+        database = FoodBlogDataset(self.path(file_name), **kwargs)
+        self.addCleanup(database.close_connection)
+        return database
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import unittest
+from asyncfoodblogdataset import AsyncFoodBlogDataset
+from test import DatabaseTestCase
+
+
+class AsyncFoodBlogDatasetTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database(pool_size=2)
+
+    def test_cancelled_write_keeps_its_slot_until_committed(self):
+        started = threading.Event()
+        finish = threading.Event()
+
+        def slow_add_recipe(*args):
+            started.set()
+            finish.wait(10)
+            return self.database.add_recipe(*args)
+
+        async def scenario():
+            blog = AsyncFoodBlogDataset(self.database)
+            write_limit = blog.limits["write"]
+            task = asyncio.ensure_future(blog.run("write", slow_add_recipe, "Milkshake", "Blend", [1], [(1, 1, 500)]))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 10)
+
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertTrue(write_limit.locked())
+
+            second = asyncio.ensure_future(blog.add_recipe("Hot cacao", "Pour", [2], [(1, 1, 250)]))
+            await asyncio.sleep(0.05)
+            self.assertFalse(second.done())
+            self.assertEqual(self.database.search_recipes(["milk"]), [])
+
+            finish.set()
+            self.assertEqual(await second, 2)
+            self.assertFalse(write_limit.locked())
+            blog.executor.shutdown(wait=True)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.database.search_recipes(["milk"]), ["Milkshake", "Hot cacao"])
+
+
+if __name__ == '__main__':
+    unittest.main()
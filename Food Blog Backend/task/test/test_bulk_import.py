@@ -0,0 +1,83 @@
+import json
+import subprocess
+import sys
+import unittest
+from foodblogdataset import BulkImportError
+from test import DatabaseTestCase
+from test.test_pagination import TASK_DIRECTORY
+
+
+class BulkImportTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database()
+
+    def write_jsonl(self, records):
+        file_name = self.path("recipes.jsonl")
+        with open(file_name, "w") as file:
+            for record in records:
+                file.write(record if isinstance(record, str) else json.dumps(record) + "\n")
+        return file_name
+
+    def imported(self):
+        return [(record["name"], record["meals"], record["quantities"]) for record in self.database.export()]
+
+    def test_jsonl(self):
+        file_name = self.write_jsonl([
+            {"name": "Milkshake", "description": "Blend", "meals": ["breakfast", "supper"],
+             "quantities": ["500 ml milk", "1 cup straw"]},
+            {"name": "Fruit salad", "meals": ["lunch"],
+             "quantities": [{"quantity": 10, "ingredient": "blackb"},
+                            {"quantity": 1, "measure": "ts", "ingredient": "sugar"}]},
+        ])
+        self.assertEqual(self.database.bulk_import(file_name, batch_size=1), 2)
+        self.assertEqual(self.imported(), [
+            ("Milkshake", ["breakfast", "supper"], [(500, "ml", "milk"), (1, "cup", "strawberry")]),
+            ("Fruit salad", ["lunch"], [(10, "", "blackberry"), (1, "tsp", "sugar")]),
+        ])
+
+    def test_csv(self):
+        file_name = self.path("recipes.csv")
+        with open(file_name, "w") as file:
+            file.write("recipe_name,recipe_description,meals,quantities\n"
+                       "Hot cacao,Pour,breakfast brunch,250 ml milk;2 tbsp cacao\n"
+                       "Berries,,,3 blueb\n")
+        self.assertEqual(self.database.bulk_import(file_name), 2)
+        self.assertEqual(self.imported(), [
+            ("Hot cacao", ["breakfast", "brunch"], [(250, "ml", "milk"), (2, "tbsp", "cacao")]),
+            ("Berries", [], [(3, "", "blueberry")]),
+        ])
+
+    def test_error_rows(self):
+        good = {"name": "Milkshake", "meals": ["breakfast"], "quantities": ["500 ml milk"]}
+        error_rows = [
+            ({"name": "Soup", "meals": ["dinner"]}, "Line 3: Unknown meal 'dinner'"),
+            ({"name": "Soup", "quantities": ["1 cup berry"]}, "Line 3: The ingredient 'berry'"),
+            ({"name": "Soup", "quantities": ["1 x milk"]}, "Line 3: The measure 'x'"),
+            ('{"name": "Soup"\n', "Line 3: "),
+            ({"name": "Soup", "quantities": ["a lot of milk"]}, "Line 3: Wrong quantity"),
+        ]
+        for number, (bad, message) in enumerate(error_rows):
+            with self.subTest(message=message):
+                database = self.open_database(f"food_blog_{number}.db")
+                file_name = self.write_jsonl([good, good, bad, good])
+                with self.assertRaises(BulkImportError) as raised:
+                    database.bulk_import(file_name, batch_size=1000)
+                self.assertTrue(str(raised.exception).startswith(message), str(raised.exception))
+                self.assertEqual(raised.exception.imported, 2)
+                self.assertEqual(database.search_recipes(["milk"]), ["Milkshake", "Milkshake"])
+
+    def test_blog_reports_the_bad_line(self):
+        file_name = self.write_jsonl([{"name": "Milkshake", "meals": ["breakfast"], "quantities": ["500 ml milk"]},
+                                      {"name": "Soup", "meals": ["dinner"]}])
+        self.database.close_connection()
+        result = subprocess.run([sys.executable, "blog.py", self.database.database_name, "import", file_name],
+                                cwd=TASK_DIRECTORY, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Line 2: Unknown meal 'dinner'", result.stderr)
+        self.assertIn("Imported 1 recipes.", result.stdout)
+        self.assertNotIn("Traceback", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import unittest
+from recipefile import write_recipes
+from test import DatabaseTestCase
+
+
+class ExportTest(DatabaseTestCase):
+    def open_database(self, file_name="food_blog.db", **kwargs):
+        database = super().open_database(file_name, **kwargs)
+        database.add_recipe("Milkshake", "Blend", [1, 3], [(1, 1, 500), (4, 3, 1)])
+        database.add_recipe("Fruit salad", "Cut", [3], [(8, 3, 10), (2, 5, 50)])
+        return database
+
+    def test_writes_go_on_during_export(self):
+        database = self.open_database(pool_size=2)
+        records = database.export(batch_size=1)
+        self.assertEqual(next(records)["name"], "Milkshake")
+
+        self.assertEqual(database.add_recipe("Hot cacao", "Pour", [2], [(1, 1, 250)]), 3)
+        self.assertEqual([record["name"] for record in records], ["Fruit salad"])
+        self.assertEqual([record["id"] for record in database.export(after_id=2)], [3])
+
+    def test_export_keeps_the_journal_mode(self):
+        database = self.open_database()
+        records = database.export()
+        next(records)
+        self.assertEqual(database.search_recipes(["milk"]), ["Milkshake"])
+        records.close()
+
+        with database.reading() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    def test_export_does_not_hold_a_pool_reader(self):
+        database = self.open_database(pool_size=1)
+        records = database.export()
+        next(records)
+        self.assertEqual(database.search_recipes(["milk"]), ["Milkshake"])
+        records.close()
+
+    def test_round_trip(self):
+        database = self.open_database()
+        for file_name in ("recipes.jsonl", "recipes.csv.gz"):
+            file_name = self.path(file_name)
+            self.assertEqual(write_recipes(file_name, database.export()), (2, 2))
+
+            copy = super().open_database(f"{os.path.basename(file_name)}.db")
+            self.assertEqual(copy.bulk_import(file_name), 2)
+            self.assertEqual(list(copy.export()), list(database.export()))
+
+
+if __name__ == '__main__':
+    unittest.main()
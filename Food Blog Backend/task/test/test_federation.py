@@ -0,0 +1,49 @@
+import unittest
+from federation import FederatedFoodBlog
+from foodblogdataset import FoodBlogDataset
+from test import DatabaseTestCase
+
+
+class FederationTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database_names = [self.path(f"shard{number}.db") for number in range(2)]
+
+        first = FoodBlogDataset(self.database_names[0])
+        first.add_recipe("Milkshake", "Blend", [1], [(1, 1, 500), (4, 3, 1)])
+        first.add_recipe("Hot cacao", "Pour", [1, 2], [(1, 1, 250), (5, 2, 2)])
+        first.close_connection()
+
+        # The second shard knows honey, which moves every ingredient id after it.
+        second = FoodBlogDataset(self.database_names[1])
+        with second.transaction() as cursor:
+            cursor.execute("INSERT INTO ingredients (ingredient_name) VALUES ('honey')")
+            honey_id = cursor.lastrowid
+        second.add_recipe("Hot cacao", "Pour", [2], [(1, 1, 250), (5, 2, 2)])
+        second.add_recipe("Milkshake", "Blend", [1], [(1, 1, 500), (5, honey_id, 1)])
+        second.close_connection()
+
+        self.federation = FederatedFoodBlog(self.database_names)
+        self.addCleanup(self.federation.close)
+
+    def global_ids(self, kind, *names):
+        global_ids = {name: global_id for global_id, name in self.federation.dictionary(kind)}
+        return sorted(global_ids[name] for name in names)
+
+    def test_results_carry_global_ids(self):
+        rows = self.federation.search_recipe_rows(["milk"])
+        self.assertEqual([(row["shard"], row["id"], row["name"]) for row in rows],
+                         [(self.database_names[0], 1, "Milkshake"),
+                          (self.database_names[0], 2, "Hot cacao"),
+                          (self.database_names[1], 2, "Milkshake")])
+        self.assertEqual(rows[0]["ingredient_ids"], self.global_ids("ingredients", "milk", "strawberry"))
+        self.assertEqual(rows[2]["ingredient_ids"], self.global_ids("ingredients", "milk", "honey"))
+        self.assertEqual(rows[1]["meal_ids"], self.global_ids("meals", "breakfast", "brunch"))
+
+    def test_text_search_dedupes_across_shards(self):
+        self.assertEqual(self.federation.search_recipes(["cacao"]), ["Hot cacao"])
+        self.assertEqual([row["shard"] for row in self.federation.search_text("milkshake")], self.database_names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import sqlite3
+import unittest
+from foodblogdataset import INDEXES, SCHEMA_VERSION, FoodBlogDataset
+from test import DatabaseTestCase
+
+BASELINE_SCHEMA = '''
+    CREATE TABLE meals(
+        meal_id INT PRIMARY KEY,
+        meal_name VARCHAR(255) UNIQUE NOT NULL
+    );
+    CREATE TABLE ingredients(
+        ingredient_id INT PRIMARY KEY,
+        ingredient_name VARCHAR(255) UNIQUE NOT NULL
+    );
+    CREATE TABLE measures(
+        measure_id INT PRIMARY KEY,
+        measure_name VARCHAR(255) UNIQUE
+    );
+    CREATE TABLE recipes(
+       recipe_id INT PRIMARY KEY,
+       recipe_name VARCHAR(255) NOT NULL,
+       recipe_description VARCHAR(255)
+    );
+    CREATE TABLE serve(
+        serve_id INT PRIMARY KEY,
+        recipe_id INT NOT NULL,
+        meal_id INT NOT NULL,
+        FOREIGN KEY(recipe_id) REFERENCES recipes(recipe_id)
+        FOREIGN KEY(meal_id) REFERENCES meals(meal_id)
+    );
+    CREATE TABLE quantity(
+        quantity_id INT PRIMARY KEY,
+        measure_id INT NOT NULL,
+        ingredient_id INT NOT NULL,
+        quantity INT NOT NULL,
+        recipe_id INT NOT NULL,
+        FOREIGN KEY(measure_id) REFERENCES measures(measure_id)
+        FOREIGN KEY(ingredient_id) REFERENCES ingredients(ingredient_id)
+        FOREIGN KEY(recipe_id) REFERENCES recipes(recipe_id)
+    );
+    INSERT INTO meals VALUES (1, 'breakfast'), (2, 'brunch'), (3, 'lunch'), (4, 'supper');
+    INSERT INTO ingredients VALUES (1, 'milk'), (2, 'cacao'), (3, 'strawberry'), (4, 'blueberry'),
+                                   (5, 'blackberry'), (6, 'sugar');
+    INSERT INTO measures VALUES (1, 'ml'), (2, 'g'), (3, 'l'), (4, 'cup'), (5, 'tbsp'), (6, 'tsp'),
+                                (7, 'dsp'), (8, '');
+    INSERT INTO recipes VALUES (1, 'Milkshake', 'Blend'), (2, 'Hot cacao', 'Pour'), (3, 'Fruit salad', 'Cut');
+    INSERT INTO serve VALUES (1, 1, 1), (2, 1, 3), (3, 2, 1), (4, 2, 2), (5, 3, 3), (6, 3, 4);
+    INSERT INTO quantity VALUES (1, 1, 1, 500, 1), (2, 4, 3, 1, 1), (3, 1, 1, 250, 2), (4, 5, 2, 2, 2),
+                                (5, 8, 3, 10, 3), (6, 2, 5, 50, 3), (7, 6, 6, 1, 3);
+'''
+
+TABLE_ROWS = {"meals": 4, "ingredients": 6, "measures": 8, "recipes": 3, "serve": 6, "quantity": 7}
+
+
+class MigrationTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database_name = self.path("baseline.db")
+        conn = sqlite3.connect(self.database_name)
+        conn.executescript(BASELINE_SCHEMA)
+        conn.close()
+
+    def test_baseline_database_is_migrated(self):
+        database = FoodBlogDataset(self.database_name)
+        database.close_connection()
+
+        conn = sqlite3.connect(self.database_name)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+
+        for table, rows in TABLE_ROWS.items():
+            self.assertEqual(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0], rows, table)
+            primary_keys = [column_type for _, _, column_type, _, _, pk in conn.execute(f"PRAGMA table_info({table})")
+                            if pk]
+            self.assertEqual(primary_keys, ["INTEGER"], table)
+
+        indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for create_index_query in INDEXES:
+            self.assertIn(create_index_query.split()[5], indexes)
+
+        self.assertEqual(conn.execute("PRAGMA foreign_key_check").fetchall(), [])
+
+    def test_migrated_database_keeps_working(self):
+        database = self.open_database("baseline.db")
+
+        self.assertEqual(database.search_recipes(["milk"]), ["Milkshake", "Hot cacao"])
+        self.assertEqual(database.search_recipes(["strawberry"], ["supper"]), ["Fruit salad"])
+        self.assertEqual(database.add_recipe("Porridge", "Cook", [1], [(1, 1, 250)]), 4)
+        self.assertEqual(database.search_text("porridge"), [(4, "Porridge")])
+
+    def test_second_open_skips_migrations(self):
+        FoodBlogDataset(self.database_name).close_connection()
+        database = self.open_database("baseline.db", read_only=True)
+        self.assertEqual(database.schema_version(), SCHEMA_VERSION)
+        self.assertEqual(len(database.recipe_rows([1, 2, 3])), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+import foodblogdataset
+from test import DatabaseTestCase
+
+TASK_DIRECTORY = os.path.dirname(os.path.abspath(foodblogdataset.__file__))
+
+
+class PaginationTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database()
+        for number in range(12):
+            quantities = [(1, 1, 100 + number)] + ([(5, 6, 1)] if number % 3 == 0 else [])
+            self.database.add_recipe(f"Recipe {number}", "", [number % 4 + 1], quantities)
+
+    def pages(self, ingredients, meals=None, limit=5):
+        pages = []
+        page_token = None
+        while True:
+            rows, page_token = self.database.page_recipes(ingredients, meals, page_token, limit)
+            pages.append(rows)
+            if page_token is None:
+                return pages
+
+    def test_pages_cover_the_search(self):
+        for ingredients, meals in ((["milk"], None), (["milk", "sugar"], None), (["milk"], ["brunch", "supper"]),
+                                   ([], None)):
+            expected = self.database.search_recipe_rows(ingredients, meals)
+            for limit in (1, 5, 12, 50):
+                pages = self.pages(ingredients, meals, limit)
+                self.assertEqual([row for page in pages for row in page], expected, (ingredients, meals, limit))
+                self.assertTrue(all(len(page) <= limit for page in pages))
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        self.assertEqual([len(page) for page in self.pages(["milk"], limit=6)], [6, 6])
+
+    def test_bad_page_arguments(self):
+        for page_token in ("not a token", "@@@@"):
+            with self.assertRaises(ValueError):
+                self.database.page_recipes(["milk"], page_token=page_token)
+        for limit in (0, -1):
+            with self.assertRaises(ValueError):
+                self.database.page_recipes(["milk"], limit=limit)
+
+    def test_iter_recipes(self):
+        expected = self.database.search_recipe_rows(["milk"])
+        self.assertEqual(list(self.database.iter_recipes(["milk"], batch_size=2)), expected)
+        self.assertEqual(list(self.database.iter_recipes(["milk"], after=expected[2][0], limit=3)), expected[3:6])
+        token = self.database.encode_page_token(expected[2][0])
+        self.assertEqual(list(self.database.iter_recipes(["milk"], after=token)), expected[3:])
+        self.assertEqual(list(self.database.iter_recipes(["blueberry"])), [])
+
+    def test_iter_meals(self):
+        self.assertEqual(list(self.database.iter_meals(batch_size=3)), self.database.list_meals())
+
+    def test_jsonl_output(self):
+        self.database.close_connection()
+        output = subprocess.run([sys.executable, "blog.py", self.database.database_name, "--ingredients=milk,sugar",
+                                 "--format", "jsonl"], cwd=TASK_DIRECTORY, capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual([json.loads(line) for line in output.splitlines()],
+                         [{"id": 1, "name": "Recipe 0"}, {"id": 4, "name": "Recipe 3"},
+                          {"id": 7, "name": "Recipe 6"}, {"id": 10, "name": "Recipe 9"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import unittest
+from unittest import mock
+import pantrysearch
+from pantrysearch import IncidenceMatrix
+from test import DatabaseTestCase
+from test.test_pagination import TASK_DIRECTORY
+
+PANTRIES = [
+    ["milk", "sugar", "strawberry"],
+    ["milk"],
+    ["cacao", "blueberry", "blackberry", "sugar"],
+    ["unknown"],
+]
+
+
+class PantrySearchTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database()
+        self.database.add_recipe("Sweet milk", "", [1], [(1, 1, 200), (6, 6, 1)])
+        self.database.add_recipe("Strawberry milk", "", [1], [(1, 1, 200), (6, 6, 1), (4, 3, 1)])
+        self.database.add_recipe("Hot cacao", "", [2], [(1, 1, 250), (5, 2, 2)])
+        self.database.add_recipe("Milk", "", [3], [(1, 1, 250)])
+        self.database.add_recipe("Sweet milk again", "", [4], [(6, 6, 2), (1, 1, 300)])
+        self.database.add_recipe("Cacao", "", [4], [(5, 2, 3)])
+
+    def rank(self, ingredients, limit=10):
+        return [(recipe["name"], recipe["missing"], recipe["extra"])
+                for recipe in self.database.rank_recipes(ingredients, limit)]
+
+    def test_order_is_missing_then_extra_then_id(self):
+        with mock.patch.object(pantrysearch, "numpy", None):
+            self.assertEqual(self.rank(["milk", "sugar", "strawberry"]), [
+                ("Strawberry milk", 0, 0),
+                ("Sweet milk", 0, 1),
+                ("Sweet milk again", 0, 1),
+                ("Milk", 0, 2),
+                ("Hot cacao", 1, 2),
+            ])
+            self.assertEqual(self.rank(["milk", "sugar", "strawberry"], limit=2),
+                             [("Strawberry milk", 0, 0), ("Sweet milk", 0, 1)])
+            self.assertEqual(self.rank(["unknown"]), [])
+
+    @unittest.skipIf(pantrysearch.numpy is None, "NumPy is not installed")
+    def test_numpy_matches_pure_python(self):
+        with self.database.reading() as cursor:
+            numpy_matrix = IncidenceMatrix(cursor)
+            with mock.patch.object(pantrysearch, "numpy", None):
+                python_matrix = IncidenceMatrix(cursor)
+
+        ingredient_ids = self.database.resolver().ingredient_ids
+        for pantry in PANTRIES:
+            pantry_ids = [ingredient_ids[name] for name in pantry if name in ingredient_ids]
+            for limit in (1, 3, 10):
+                with self.subTest(pantry=pantry, limit=limit):
+                    expected = numpy_matrix.rank(pantry_ids, len(pantry), limit)
+                    with mock.patch.object(pantrysearch, "numpy", None):
+                        self.assertEqual(python_matrix.rank(pantry_ids, len(pantry), limit), expected)
+
+    def test_closest_needs_ingredients(self):
+        self.database.close_connection()
+        result = subprocess.run([sys.executable, "blog.py", self.database.database_name, "--closest"],
+                                cwd=TASK_DIRECTORY, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--closest needs --ingredients", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
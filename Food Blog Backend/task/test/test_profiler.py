@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+from profiler import Profiler
+from test import DatabaseTestCase
+
+
+class ProfilerTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database(profile=True)
+        self.database.profile_reset()
+
+    def test_statements_are_counted_once(self):
+        self.database.add_recipe("Milkshake", "Blend", [1, 3], [(1, 1, 500)])
+        statements = self.database.profile_snapshot()["statements"]
+
+        self.assertEqual(statements["INSERT INTO recipes (recipe_name, recipe_description) VALUES (?, ?);"]["executed"],
+                         1)
+        self.assertEqual(statements["INSERT INTO serve (recipe_id, meal_id) VALUES (?, ?);"]["executed"], 2)
+        self.assertEqual(statements["BEGIN IMMEDIATE"]["executed"], 1)
+        self.assertEqual(statements["COMMIT"]["executed"], 1)
+        self.assertFalse([sql for sql in statements if sql.startswith("--")])
+
+
+    def test_trace_is_installed_once_per_connection(self):
+        with mock.patch.object(Profiler, "install", autospec=True, side_effect=Profiler.install) as install:
+            database = self.open_database("pooled.db", pool_size=1, profile=True)
+            database.profile_reset()
+            for number in range(3):
+                database.add_recipe(f"Recipe {number}", "", [1], [(1, 1, 100)])
+                database.search_recipes(["milk"])
+            self.assertEqual(install.call_count, 2)
+
+            list(database.export())
+            self.assertEqual(install.call_count, 3)
+
+        statements = database.profile_snapshot()["statements"]
+        self.assertEqual(statements["BEGIN IMMEDIATE"]["executed"], 3)
+        self.assertEqual(statements["COMMIT"]["executed"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from test import DatabaseTestCase
+from test.test_snapshot import QUERIES
+
+
+class RecipeIndexTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database(use_index=True)
+        self.sql_database = self.open_database()
+
+        self.database.add_recipe("Milkshake", "Blend", [1, 3, 4], [(1, 1, 500), (4, 3, 1), (5, 6, 1)])
+        self.database.add_recipe("Hot cacao", "Pour", [1, 2], [(1, 1, 250), (5, 2, 2)])
+
+    def assert_same_rows(self):
+        for ingredients, meals in QUERIES:
+            self.assertEqual(self.database.search_recipe_rows(ingredients, meals),
+                             self.sql_database.search_recipe_rows(ingredients, meals), (ingredients, meals))
+
+    def test_matches_sql(self):
+        self.assertIsNotNone(self.database.index)
+        self.assertIsNone(self.sql_database.index)
+        self.assert_same_rows()
+
+    def test_matches_sql_after_add_recipe(self):
+        self.database.add_recipe("Fruit salad", "Cut", [3, 4], [(8, 3, 10), (2, 5, 50), (6, 6, 1)])
+        self.database.add_recipe("Blueberry milk", "Shake", [2], [(1, 1, 100), (2, 4, 30)])
+        self.database.add_to_recipe(2, [3], [(6, 6, 2)])
+        self.assert_same_rows()
+        self.assertEqual(self.database.search_recipes(["milk", "sugar"], ["lunch"]), ["Milkshake", "Hot cacao"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import sqlite3
+import unittest
+from resolver import AMBIGUOUS
+from test import DatabaseTestCase
+
+
+class ResolverTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database()
+
+    def add_honey_elsewhere(self):
+        conn = sqlite3.connect(self.database.database_name)
+        with conn:
+            honey_id = conn.execute("INSERT INTO ingredients (ingredient_name) VALUES ('honey')").lastrowid
+            recipe_id = conn.execute("INSERT INTO recipes (recipe_name, recipe_description) "
+                                     "VALUES ('Honey milk', 'Stir')").lastrowid
+            conn.execute("INSERT INTO quantity (measure_id, ingredient_id, quantity, recipe_id) VALUES (5, ?, 1, ?)",
+                         (honey_id, recipe_id))
+        conn.close()
+        return honey_id
+
+    def test_lookups(self):
+        resolver = self.database.resolver()
+        self.assertEqual(resolver.lookup_measure("ml"), 1)
+        self.assertEqual(resolver.lookup_measure(""), 8)
+        self.assertEqual(resolver.lookup_ingredient("straw"), 3)
+        self.assertIs(resolver.lookup_ingredient("berry"), AMBIGUOUS)
+        self.assertIsNone(resolver.lookup_ingredient("honey"))
+
+    def test_outside_dictionary_changes_are_seen(self):
+        self.assertIsNone(self.database.resolver().lookup_ingredient("honey"))
+        honey_id = self.add_honey_elsewhere()
+
+        self.assertEqual(self.database.resolver().lookup_ingredient("honey"), honey_id)
+        self.assertEqual(self.database.search_recipes(["honey"]), ["Honey milk"])
+        self.assertEqual([recipe["name"] for recipe in self.database.rank_recipes(["honey"])], ["Honey milk"])
+
+    def test_bulk_import_sees_outside_dictionary_changes(self):
+        self.database.resolver()
+        self.add_honey_elsewhere()
+
+        file_name = self.path("recipes.jsonl")
+        with open(file_name, "w") as file:
+            file.write(json.dumps({"name": "Honey tea", "meals": ["breakfast"], "quantities": ["1 tsp honey"]}) + "\n")
+        self.assertEqual(self.database.bulk_import(file_name), 1)
+        self.assertEqual(self.database.search_recipes(["honey"], ["breakfast"]), ["Honey tea"])
+
+    def test_unchanged_database_keeps_the_resolver(self):
+        resolver = self.database.resolver()
+        self.assertIs(self.database.resolver(), resolver)
+
+
+if __name__ == '__main__':
+    unittest.main()
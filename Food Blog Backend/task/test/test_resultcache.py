@@ -0,0 +1,64 @@
+import sqlite3
+import unittest
+from resultcache import ResultCache
+from test import DatabaseTestCase
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_lru_eviction_and_generation(self):
+        cache = ResultCache(max_size=2)
+        cache.put("a", 1, [1])
+        cache.put("b", 1, [2])
+        self.assertEqual(cache.get("a", 1), [1])
+        cache.put("c", 1, [3])
+        self.assertIsNone(cache.get("b", 1))
+        self.assertIsNone(cache.get("a", 2))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["invalidations"]), (1, 2, 1, 1))
+
+    def test_ttl_expiration(self):
+        cache = ResultCache(ttl=0)
+        cache.put("a", 1, [1])
+        self.assertIsNone(cache.get("a", 1))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+
+class CachedSearchTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database(cache_size=16)
+        self.database.add_recipe("Milkshake", "Blend", [1], [(1, 1, 500)])
+
+    def test_repeated_search_is_a_hit(self):
+        self.assertEqual(self.database.search_recipes(["milk"]), ["Milkshake"])
+        self.assertEqual(self.database.search_recipes(["milk"]), ["Milkshake"])
+        self.assertEqual(self.database.cache_stats()["hits"], 1)
+
+    def test_own_writes_invalidate(self):
+        self.assertEqual(self.database.search_recipes(["milk"]), ["Milkshake"])
+        recipe_id = self.database.insert_recipe("Hot cacao", "Pour")
+        self.database.insert_quantity(1, 1, 250, recipe_id)
+        self.assertEqual(self.database.search_recipes(["milk"]), ["Milkshake", "Hot cacao"])
+
+        self.database.meals_to_serve([2], recipe_id)
+        self.assertEqual(self.database.search_recipes(["milk"], ["brunch"]), ["Hot cacao"])
+        self.assertEqual(self.database.cache_stats()["hits"], 0)
+
+    def test_other_connections_invalidate(self):
+        self.assertEqual(self.database.search_recipes(["milk"]), ["Milkshake"])
+
+        conn = sqlite3.connect(self.database.database_name)
+        with conn:
+            recipe_id = conn.execute("INSERT INTO recipes (recipe_name, recipe_description) "
+                                     "VALUES ('Latte', 'Froth')").lastrowid
+            conn.execute("INSERT INTO quantity (measure_id, ingredient_id, quantity, recipe_id) VALUES (1, 1, 200, ?)",
+                         (recipe_id,))
+        conn.close()
+
+        self.assertEqual(self.database.search_recipes(["milk"]), ["Milkshake", "Latte"])
+        self.assertEqual(self.database.cache_stats()["invalidations"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
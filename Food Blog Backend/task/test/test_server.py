@@ -0,0 +1,85 @@
+import http.client
+import json
+import sqlite3
+import threading
+import unittest
+from unittest import mock
+from foodblogserver import FoodBlogServer
+from test import DatabaseTestCase
+
+
+class FoodBlogServerTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database(pool_size=2)
+        self.database.add_recipe("Milkshake", "Blend", [1], [(1, 1, 500)])
+
+        self.server = FoodBlogServer(("127.0.0.1", 0), self.database)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=10)
+        try:
+            conn.request("GET", path, headers=headers or {})
+            response = conn.getresponse()
+            body = response.read()
+            return response.status, dict(response.getheaders()), json.loads(body) if body else None
+        finally:
+            conn.close()
+
+    def test_routes(self):
+        status, headers, payload = self.get("/recipes?ingredients=milk&meals=breakfast")
+        self.assertEqual((status, payload), (200, {"recipes": [{"id": 1, "name": "Milkshake"}]}))
+        self.assertEqual(headers["Content-Type"], "application/json")
+        self.assertIn("ETag", headers)
+
+        self.assertEqual(self.get("/recipes/1")[0], 200)
+        for path in ("/recipes/2", "/recipes/x", "/unknown"):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)[0], 404)
+
+    def test_if_none_match(self):
+        _, headers, _ = self.get("/meals")
+        status, not_modified_headers, payload = self.get("/meals", {"If-None-Match": headers["ETag"]})
+        self.assertEqual((status, payload), (304, None))
+        self.assertEqual(not_modified_headers["ETag"], headers["ETag"])
+        self.assertEqual(self.get("/meals", {"If-None-Match": '"other"'})[0], 200)
+
+    def test_if_modified_since(self):
+        _, headers, _ = self.get("/meals")
+        self.assertEqual(self.get("/meals", {"If-Modified-Since": headers["Last-Modified"]})[0], 304)
+        self.assertEqual(self.get("/meals", {"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"})[0], 200)
+        self.assertEqual(self.get("/meals", {"If-Modified-Since": "yesterday"})[0], 200)
+
+    def test_outside_write_invalidates(self):
+        _, headers, _ = self.get("/recipes?ingredients=milk")
+
+        conn = sqlite3.connect(self.database.database_name)
+        with conn:
+            recipe_id = conn.execute("INSERT INTO recipes (recipe_name, recipe_description) "
+                                     "VALUES ('Latte', 'Froth')").lastrowid
+            conn.execute("INSERT INTO quantity (measure_id, ingredient_id, quantity, recipe_id) VALUES (1, 1, 200, ?)",
+                         (recipe_id,))
+        conn.close()
+
+        status, changed_headers, payload = self.get("/recipes?ingredients=milk", {"If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(changed_headers["ETag"], headers["ETag"])
+        self.assertEqual([recipe["name"] for recipe in payload["recipes"]], ["Milkshake", "Latte"])
+
+    def test_database_errors_are_json(self):
+        with mock.patch.object(self.database, "search_recipe_rows", side_effect=sqlite3.OperationalError("locked")), \
+                mock.patch.object(self.server.RequestHandlerClass, "log_message"):
+            status, headers, payload = self.get("/recipes?ingredients=milk")
+        self.assertEqual((status, payload), (500, {"error": "Internal server error"}))
+        self.assertEqual(headers["Content-Type"], "application/json")
+
+        self.assertEqual(self.get("/recipes?ingredients=milk")[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
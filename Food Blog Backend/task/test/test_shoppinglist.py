@@ -0,0 +1,47 @@
+import subprocess
+import sys
+import unittest
+from test import DatabaseTestCase
+from test.test_pagination import TASK_DIRECTORY
+
+
+class ShoppingListTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database()
+        self.database.add_recipe("Sweet tea", "", [1], [(6, 6, 1), (5, 6, 2), (2, 6, 10), (8, 6, 3)])
+        self.database.add_recipe("Milk", "", [2], [(4, 1, 1), (3, 1, 1)])
+
+    def test_units_are_summed_per_base_unit(self):
+        self.assertEqual(list(self.database.aggregate_ingredients([1, 2])), [
+            ("milk", "ml", 1240),
+            ("sugar", "", 3),
+            ("sugar", "g", 10),
+            ("sugar", "ml", 35),
+        ])
+
+    def test_duplicate_ids_count_twice(self):
+        self.assertEqual(list(self.database.aggregate_ingredients([2, 1, 2])), [
+            ("milk", "ml", 2480),
+            ("sugar", "", 3),
+            ("sugar", "g", 10),
+            ("sugar", "ml", 35),
+        ])
+        self.assertEqual(list(self.database.aggregate_ingredients([3])), [])
+
+    def run_blog(self, shopping_list):
+        return subprocess.run([sys.executable, "blog.py", self.database.database_name, "--shopping-list", shopping_list],
+                              cwd=TASK_DIRECTORY, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+
+    def test_blog_shopping_list(self):
+        self.database.close_connection()
+        result = self.run_blog("2,2")
+        self.assertEqual((result.returncode, result.stdout), (0, "milk: 2480 ml\n"))
+
+        result = self.run_blog("1,x")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("expected comma separated recipe ids, got '1,x'", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
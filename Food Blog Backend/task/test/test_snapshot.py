@@ -0,0 +1,67 @@
+import unittest
+from snapshot import Snapshot, is_snapshot, write_snapshot
+from test import DatabaseTestCase
+
+QUERIES = [
+    (["milk"], None),
+    (["milk", "sugar"], None),
+    (["strawberry"], ["supper"]),
+    (["milk"], ["brunch", "lunch"]),
+    ([], None),
+    ([], ["breakfast"]),
+    (["blueberry"], None),
+    (["unknown"], None),
+    (["milk"], ["unknown"]),
+]
+
+
+class SnapshotTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database()
+        self.file_name = self.path("food_blog.snap")
+
+        self.database.add_recipe("Milkshake", "Blend", [1, 3, 4], [(1, 1, 500), (4, 3, 1), (5, 6, 1)])
+        self.database.add_recipe("Hot cacao", "Pour", [1, 2], [(1, 1, 250), (5, 2, 2)])
+        self.database.add_recipe("Fruit salad", "Cut", [3, 4], [(8, 3, 10), (2, 5, 50), (6, 6, 1)])
+        self.database.add_recipe("Zażółć", "Unicode name", [2], [(1, 1, 100), (6, 6, 2)])
+
+    def open_snapshot(self):
+        write_snapshot(self.database, self.file_name)
+        snapshot = Snapshot(self.file_name)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_search_matches_database(self):
+        snapshot = self.open_snapshot()
+        self.assertTrue(is_snapshot(self.file_name))
+        for ingredients, meals in QUERIES:
+            self.assertEqual(snapshot.search_recipe_rows(ingredients, meals),
+                             self.database.search_recipe_rows(ingredients, meals), (ingredients, meals))
+
+    def test_dictionaries_and_names(self):
+        snapshot = self.open_snapshot()
+        self.assertEqual(set(snapshot.ingredient_ids), {name for _, name in self.database.available_ingredients()})
+        self.assertEqual(set(snapshot.meal_ids), {name for _, name in self.database.list_meals()})
+        self.assertEqual(snapshot.search_recipes(["milk", "sugar"], ["brunch"]), ["Zażółć"])
+
+    def test_building_keeps_the_journal_mode(self):
+        self.open_snapshot()
+        with self.database.reading() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    def test_writes_go_on_while_building(self):
+        snapshot = self.open_snapshot()
+        self.assertEqual(self.database.add_recipe("Latte", "Froth", [1], [(1, 1, 200)]), 5)
+        self.assertNotIn("Latte", snapshot.search_recipes(["milk"]))
+
+    def test_rejects_other_files(self):
+        with open(self.file_name, "wb") as file:
+            file.write(b"SQLite format 3\0")
+        self.assertFalse(is_snapshot(self.file_name))
+        with self.assertRaises(ValueError):
+            Snapshot(self.file_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+import unittest
+from test import DatabaseTestCase
+from writerqueue import GroupCommitWriter
+
+
+class GroupCommitWriterTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = self.open_database(pool_size=2, use_index=True)
+
+    def open_writer(self, **kwargs):
+        writer = GroupCommitWriter(self.database, **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_needs_a_pool(self):
+        database = self.open_database()
+        with self.assertRaises(ValueError):
+            GroupCommitWriter(database)
+
+    def test_concurrent_submissions_are_grouped(self):
+        writer = self.open_writer(max_latency=0.05)
+        futures = []
+        lock = threading.Lock()
+
+        def submit(producer):
+            for number in range(50):
+                future = writer.add_recipe(f"Recipe {producer}-{number}", "", [1], [(1, 1, number + 1)])
+                with lock:
+                    futures.append(future)
+
+        producers = [threading.Thread(target=submit, args=(producer,)) for producer in range(4)]
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+
+        recipe_ids = [future.result(timeout=10) for future in futures]
+        self.assertEqual(len(set(recipe_ids)), 200)
+        self.assertLess(writer.stats()["flushes"], 200)
+        self.assertEqual(len(self.database.search_recipes(["milk"], ["breakfast"])), 200)
+
+    def test_failure_only_fails_its_own_request(self):
+        writer = self.open_writer(max_latency=0.5, max_batch=3)
+        before = writer.add_recipe("Milkshake", "Blend", [1], [(1, 1, 500)])
+        failing = writer.add_recipe("Broken", "Unknown meal", [99], [(1, 1, 1)])
+        after = writer.add_to_recipe(1, [3])
+
+        self.assertEqual(before.result(timeout=10), 1)
+        self.assertIsInstance(failing.exception(timeout=10), sqlite3.IntegrityError)
+        self.assertEqual(after.result(timeout=10), 1)
+
+        self.assertEqual(self.database.search_recipes(["milk"], ["lunch"]), ["Milkshake"])
+        self.assertEqual([name for _, name in self.database.recipe_rows([1, 2])], ["Milkshake"])
+        self.assertEqual(writer.stats()["failed"], 1)
+        self.assertEqual(writer.stats()["flushes"], 1)
+
+    def test_closed_writer_rejects_requests(self):
+        writer = self.open_writer()
+        future = writer.add_recipe("Milkshake", "Blend")
+        writer.close()
+        self.assertEqual(future.result(timeout=10), 1)
+        with self.assertRaises(RuntimeError):
+            writer.add_recipe("Too late", "")
+
+
+if __name__ == '__main__':
+    unittest.main()
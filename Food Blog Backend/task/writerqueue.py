@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from foodblogdataset import FoodBlogDataset
+
+STOP = object()
+
+
+class GroupCommitWriter:
+    def __init__(self, database, max_latency=0.005, max_batch=256):
+        if database.pool is None:
+            raise ValueError("GroupCommitWriter needs a FoodBlogDataset opened with pool_size")
+
+        self.database = database
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self.requests = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.counters = {
+            "submitted": 0,
+            "committed": 0,
+            "failed": 0,
+            "flushes": 0,
+            "largest_flush": 0,
+        }
+        self.thread = threading.Thread(target=self.run, name="foodblog-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, kind, *args):
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            self.counters["submitted"] += 1
+            self.requests.put((future, kind, args))
+        return future
+
+    def add_recipe(self, name, description, meal_ids=(), quantities=()):
+        return self.submit("recipe", name, description, list(meal_ids), list(quantities))
+
+    def add_to_recipe(self, recipe_id, meal_ids=(), quantities=()):
+        return self.submit("rows", recipe_id, list(meal_ids), list(quantities))
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            request = self.requests.get()
+            if request is STOP:
+                break
+
+            batch = [request]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch:
+                try:
+                    request = self.requests.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if request is STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+            self.flush(batch)
+
+    @staticmethod
+    def write(cursor, kind, args):
+        if kind == "recipe":
+            name, description, meal_ids, quantities = args
+            cursor.execute("INSERT INTO recipes (recipe_name, recipe_description) VALUES (?, ?);",
+                           (name, description))
+            recipe_id = cursor.lastrowid
+        else:
+            recipe_id, meal_ids, quantities = args
+
+        serve_rows = [(recipe_id, meal_id) for meal_id in meal_ids]
+        quantity_rows = [(measure_id, ingredient_id, quantity, recipe_id)
+                         for measure_id, ingredient_id, quantity in quantities]
+        FoodBlogDataset.insert_rows(cursor, serve_rows, quantity_rows)
+        return recipe_id, serve_rows, quantity_rows
+
+    def flush(self, batch):
+        # One transaction (and one fsync) per flush; a savepoint per request keeps
+        # a failing request from rolling back the others in the same flush.
+        done = []
+        failed = []
+        try:
+            with self.database.transaction() as cursor:
+                for future, kind, args in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    cursor.execute("SAVEPOINT request")
+                    try:
+                        done.append((future, self.write(cursor, kind, args)))
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO request")
+                        failed.append((future, e))
+                    cursor.execute("RELEASE request")
+        except Exception as e:
+            done = []
+            failed = [(future, e) for future, _, _ in batch if not future.cancelled()]
+
+        serve_rows = [row for _, (_, rows, _) in done for row in rows]
+        quantity_rows = [row for _, (_, _, rows) in done for row in rows]
+        self.database.update_index(serve_rows, quantity_rows)
+
+        with self.lock:
+            self.counters["committed"] += len(done)
+            self.counters["failed"] += len(failed)
+            self.counters["flushes"] += 1
+            self.counters["largest_flush"] = max(self.counters["largest_flush"], len(batch))
+
+        for future, (recipe_id, _, _) in done:
+            future.set_result(recipe_id)
+        for future, e in failed:
+            future.set_exception(e)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats["pending"] = self.requests.qsize()
+        return stats
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.requests.put(STOP)
+        self.thread.join()